@@ -0,0 +1,79 @@
+# Measures the query highlighting of HTML reports
+# Usage: python -m benchmarks.bench_highlight [-n 100000] [-q "python jobs remote"]
+import re
+import argparse
+from time import time
+
+from search_engines import output as out
+from search_engines.results import SearchResults
+
+
+class ReportEngine(object):
+    """Stands in for an engine whose results are reported, with every field highlighted"""
+    def __init__(self, query, count):
+        self._query = query
+        self._filters = ['url', 'title', 'text']
+        self.results = SearchResults(make_items(query, count))
+
+
+def make_items(query, count, hosts=1000):
+    """Returns `count` result items that mention the query terms"""
+    terms = query.split()
+    return [
+        {
+            'host': f'host{i % hosts}.com',
+            'link': f'https://host{i % hosts}.com/{terms[i % len(terms)]}/{i}',
+            'title': f'{terms[i % len(terms)].title()} result {i}',
+            'text': f'Result {i} is about {query.upper()} and more {terms[0]}, {terms[-1]} ...'
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_highlight(query, data):
+    """The highlighting that preceded the Highlighter (one findall, then one replace per match), 
+    applied per query term so that both mark the same text"""
+    for term in query.split():
+        for match in re.findall(re.escape(term), data, re.I):
+            data = data.replace(match, u'<b>{}</b>'.format(match))
+    return data
+
+
+def bench_fields(engine):
+    """Returns the seconds to highlight all fields, with the legacy loop and with the Highlighter"""
+    fields = [v[f] for v in engine.results for f in ('link', 'title', 'text')]
+    start = time()
+    for data in fields:
+        legacy_highlight(engine._query, data)
+    legacy = time() - start
+
+    start = time()
+    highlight = out.Highlighter(engine._query)
+    for data in fields:
+        highlight(data)
+    return legacy, time() - start
+
+
+def bench_report(engine):
+    """Returns the seconds to render the HTML report, and its size"""
+    start = time()
+    html = out.create_html_data([engine])
+    return time() - start, len(html)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='report rows', default=100000, type=int)
+    ap.add_argument('-q', help='query', default='python jobs remote')
+    args = ap.parse_args()
+
+    engine = ReportEngine(args.q, args.n)
+    legacy, highlighter = bench_fields(engine)
+    report, size = bench_report(engine)
+    print(f"rows: {args.n}  query: {args.q!r}")
+    print(f"{'legacy highlight (s)':>22} {'highlighter (s)':>16} {'speedup':>8} {'html report (s)':>16} {'MB':>6}")
+    print(f"{legacy:>22.3f} {highlighter:>16.3f} {legacy / highlighter:>7.1f}x {report:>16.3f} {size / 1e6:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# Measures the memory used per stored search result
+# Usage: python -m benchmarks.bench_memory [-n 1000000]
+import argparse
+import tracemalloc
+
+from search_engines.results import SearchResults
+from benchmarks.bench_results import make_items
+
+
+def measure(count, store):
+    """Returns the bytes allocated per item by `store`"""
+    items = make_items(count)
+    tracemalloc.start()
+    stored = store(items)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del stored
+    return size / count
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='number of results', default=1000000, type=int)
+    args = ap.parse_args()
+
+    dicts = measure(args.n, lambda items: [dict(i) for i in items])
+    results = measure(args.n, SearchResults)
+    print(f"{args.n} results")
+    print(f"list of dicts:   {dicts:>8.1f} bytes/result (container only)")
+    print(f"SearchResults:   {results:>8.1f} bytes/result (records + indexes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# Measures how fast each engine turns result pages into results, and flags regressions
+# Usage: python -m benchmarks.bench_parsers [-e bing,google] [-r 20] [-parser lxml] [-save] [-threshold 0.15]
+#        python -m benchmarks.bench_parsers -compare [-e google,bing,yahoo,duckduckgo]
+#
+# Pages are read from benchmarks/fixtures/<engine>/*.html (*.json for Qwant). Missing fixtures
+# are generated with the mock server; saved real pages can replace them.
+import os
+import sys
+import json
+import glob
+import argparse
+import platform
+import tracemalloc
+from time import perf_counter
+
+from search_engines import config, utils
+from search_engines.engines import search_engines_dict
+from search_engines.mock_server import MockSerpServer
+from search_engines.parsers import ParsedPage, resolve_parser, _response
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsers_baseline.json')
+QUERY = 'search engines benchmark'
+FIXTURE_PAGES = 2
+
+
+def load_fixtures(name):
+    """Returns the stored pages of an engine, generating them if there are none"""
+    paths = sorted(glob.glob(os.path.join(FIXTURES_DIR, name, '*.*')))
+    if not paths:
+        paths = generate_fixtures(name)
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+def generate_fixtures(name, pages=FIXTURE_PAGES):
+    """Saves the mock server's result pages of an engine"""
+    directory = os.path.join(FIXTURES_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    server = MockSerpServer(pages=pages + 1)
+    paths = []
+    try:
+        for page in range(1, pages + 1):
+            response = server.results_page(name, QUERY, page)
+            ext = 'json' if 'json' in response.content_type else 'html'
+            path = os.path.join(directory, f'page{page}.{ext}')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(response.body)
+            paths.append(path)
+    finally:
+        server._server.server_close()
+    return paths
+
+
+def make_engine(name):
+    """Returns an engine that's ready to process pages"""
+    engine = search_engines_dict[name](timeout=config.TIMEOUT)
+    engine._query = QUERY
+    return engine
+
+
+def make_legacy_engine(name, parser):
+    """Returns an engine that extracts results the way it did before the selectors were compiled: 
+    every lookup parses its selector, the URL of each item is extracted twice, and Google's result 
+    nodes are serialized, wrapped in <item> tags and parsed again"""
+    engine = make_engine(name)
+    engine.parser = parser
+    engine._select = lambda tag, element: tag.select(engine._selectors(element))
+    engine._select_one = lambda tag, element: tag.select_one(engine._selectors(element))
+
+    def item(link):
+        return {
+            'host': utils.domain(engine._get_url(link)), 
+            'link': engine._get_url(link), 
+            'title': engine._get_title(link).strip(), 
+            'text': engine._get_text(link).strip()
+        }
+    engine._item = item
+
+    if name == 'google':
+        def result_tags(page):
+            tags = [i.find_parent('div').find_parent('div') for i in page.soup.select('div a[href^="/url?q="]')][:-1]
+            soup = engine._parse(''.join('<item>' + str(i) + '</item>' for i in tags))
+            return soup.select('item')
+        engine._result_tags = result_tags
+    return engine
+
+
+def process(engine, html, parser):
+    """Parses a page, extracts its results and its next page; returns the number of results"""
+    page = ParsedPage(_response(200, html), parser)
+    results = engine._filter_results(page)
+    engine._next_page(page)
+    return len(results)
+
+
+def bench_throughput(name, pages, parser, repeat):
+    """Returns the pages/sec and results/sec of an engine"""
+    engine = make_engine(name)
+    count = 0
+    start = perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            count += process(engine, html, parser)
+    elapsed = perf_counter() - start
+    return len(pages) * repeat / elapsed, count / elapsed
+
+
+def bench_memory(name, pages, parser):
+    """Returns the peak bytes allocated while processing one page"""
+    engine = make_engine(name)
+    peak = 0
+    for html in pages:
+        tracemalloc.start()
+        process(engine, html, parser)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def bench_fields(name, pages, parser, repeat):
+    """Returns the microseconds per page spent parsing and extracting each field"""
+    engine = make_engine(name)
+    getters = {'url': engine._get_url, 'title': engine._get_title, 'text': engine._get_text}
+    times = dict.fromkeys(['parse', 'nodes'] + list(getters), 0.0)
+    for _ in range(repeat):
+        for html in pages:
+            page = ParsedPage(_response(200, html), parser)
+            start = perf_counter()
+            page.json if html.lstrip().startswith('{') else page.soup
+            times['parse'] += perf_counter() - start
+
+            start = perf_counter()
+            tags = engine._result_tags(page)
+            times['nodes'] += perf_counter() - start
+            for field, getter in getters.items():
+                start = perf_counter()
+                for tag in tags:
+                    getter(tag)
+                times[field] += perf_counter() - start
+    return {field: t / (len(pages) * repeat) * 1e6 for field, t in times.items()}
+
+
+def run(names, parser, repeat):
+    """Benchmarks the engines, returns the measurements per engine"""
+    report = {}
+    for name in names:
+        pages = load_fixtures(name)
+        pages_sec, results_sec = bench_throughput(name, pages, parser, repeat)
+        report[name] = {
+            'pages_sec': round(pages_sec, 1),
+            'results_sec': round(results_sec, 1),
+            'peak_kb': round(bench_memory(name, pages, parser) / 1024.0, 1),
+            'field_us': {k: round(v, 1) for k, v in bench_fields(name, pages, parser, repeat).items()}
+        }
+    return report
+
+
+def compare(names, parser, repeat):
+    """Returns the pages/sec of the legacy and the current extraction per engine. 
+    Both must extract the same results, or the comparison is meaningless."""
+    report = {}
+    for name in names:
+        pages = load_fixtures(name)
+        legacy, current = make_legacy_engine(name, parser), make_engine(name)
+        for html in pages:
+            expected = current._filter_results(ParsedPage(_response(200, html), parser))
+            if legacy._filter_results(ParsedPage(_response(200, html), parser)) != expected:
+                raise AssertionError(f"{name}: the legacy and current extraction differ")
+
+        speed = {}
+        for label, engine in (('legacy', legacy), ('current', current)):
+            start = perf_counter()
+            for _ in range(repeat):
+                for html in pages:
+                    process(engine, html, parser)
+            speed[label] = len(pages) * repeat / (perf_counter() - start)
+        report[name] = speed
+    return report
+
+
+def regressions(report, baseline, threshold):
+    """Returns the (engine, metric, baseline, current) values that are worse than the baseline by more than `threshold`"""
+    found = []
+    for name, current in report.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('pages_sec', 'results_sec'):
+            if previous[metric] and current[metric] < previous[metric] * (1 - threshold):
+                found.append((name, metric, previous[metric], current[metric]))
+        if previous['peak_kb'] and current['peak_kb'] > previous['peak_kb'] * (1 + threshold):
+            found.append((name, 'peak_kb', previous['peak_kb'], current['peak_kb']))
+    return found
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-e', help='engines (default: all)', default=','.join(search_engines_dict))
+    ap.add_argument('-r', help='passes over the fixtures', default=20, type=int)
+    ap.add_argument('-parser', help='HTML parser backend', default=config.PARSER)
+    ap.add_argument('-baseline', help='baseline JSON file', default=BASELINE)
+    ap.add_argument('-save', help='save the results as the baseline', action='store_true')
+    ap.add_argument('-threshold', help='slowdown ratio reported as a regression', default=0.15, type=float)
+    ap.add_argument('-compare', help='compare the legacy and current result extraction', action='store_true')
+    args = ap.parse_args()
+
+    parser = resolve_parser(args.parser)
+    names = [n.strip() for n in args.e.lower().split(',') if n.strip() in search_engines_dict]
+    if args.compare:
+        print(f"parser: {parser}")
+        print(f"{'engine':<12} {'legacy pages/s':>15} {'current pages/s':>16} {'speedup':>8}")
+        for name, r in compare(names, parser, args.r).items():
+            print(f"{name:<12} {r['legacy']:>15.1f} {r['current']:>16.1f} {r['current'] / r['legacy']:>7.2f}x")
+        return 0
+    report = run(names, parser, args.r)
+
+    fields = ['parse', 'nodes', 'url', 'title', 'text']
+    print(f"parser: {parser}")
+    print(f"{'engine':<12} {'pages/s':>9} {'results/s':>10} {'peak KB':>8}  " + ' '.join(f'{f + " us":>9}' for f in fields))
+    for name, r in report.items():
+        print(f"{name:<12} {r['pages_sec']:>9.1f} {r['results_sec']:>10.1f} {r['peak_kb']:>8.1f}  " +
+              ' '.join(f"{r['field_us'][f]:>9.1f}" for f in fields))
+
+    if args.save:
+        meta = {'parser': parser, 'python': platform.python_version(), 'repeat': args.r}
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': meta, 'engines': report}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['meta']['parser'] != parser:
+        print(f"Warning: the baseline was measured with the {baseline['meta']['parser']} parser")
+    found = regressions(report, baseline['engines'], args.threshold)
+    for name, metric, previous, current in found:
+        print(f"REGRESSION {name} {metric}: {previous} -> {current}")
+    if not found:
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
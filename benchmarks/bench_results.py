@@ -0,0 +1,51 @@
+# Measures SearchResults duplicate checks at growing result counts
+# Usage: python -m benchmarks.bench_results [-n 10000,100000,1000000]
+import argparse
+from time import time
+
+from search_engines.results import SearchResults
+
+
+def make_items(count, hosts=1000):
+    """Returns `count` result items spread over `hosts` domains"""
+    return [
+        {
+            'host': f'host{i % hosts}.com',
+            'link': f'https://host{i % hosts}.com/page/{i}',
+            'title': f'Title {i}',
+            'text': f'Description of result {i}'
+        }
+        for i in range(count)
+    ]
+
+
+def bench_collect(count):
+    """Collects `count` items with URL and domain duplicate checks"""
+    items = make_items(count)
+    results = SearchResults()
+    start = time()
+    for item in items:
+        if item in results or results.has_link(item['link']):
+            continue
+        results.append(item)
+    collected = time() - start
+
+    start = time()
+    hits = sum(results.has_host(item['host']) for item in items)
+    lookups = time() - start
+    return collected, lookups, hits
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-n', help='result counts', default='10000,100000,1000000')
+    args = ap.parse_args()
+
+    print(f"{'results':>10} {'collect (s)':>12} {'us/item':>8} {'host lookups (s)':>17}")
+    for count in [int(n) for n in args.n.split(',')]:
+        collected, lookups, _ = bench_collect(count)
+        print(f"{count:>10} {collected:>12.3f} {collected / count * 1e6:>8.2f} {lookups:>17.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,13 @@
 import argparse
 import csv
 import os
-import time
 from pathlib import Path
 
 try:
     from search_engines.engines import search_engines_dict
     from search_engines import config
     from search_engines import output as out
+    from search_engines import search_many
 except ImportError as e:
     msg = '"{}"\nPlease install `search_engines` to resolve this error.'
     raise ImportError(msg.format(str(e)))
@@ -71,79 +71,26 @@ class EnhancedSearchEngine:
             print(f"Page {page_num}: No new unique results found")
     
     def search_with_strategy(self, query, pages, csv_filename):
-        """Enhanced search with better debugging"""
-        from time import sleep
-        from random import uniform as random_uniform
-        from bs4 import BeautifulSoup
-        from search_engines import utils
-        from search_engines.results import SearchResults
-        
+        """Enhanced search that saves each page as soon as it arrives"""
         self.setup_csv(csv_filename)
         
         print(f'Searching {self.engine.__class__.__name__} for: "{query}"')
-        self.engine._query = utils.decode_bytes(query)
-        self.engine.results = SearchResults()
-        
-        try:
-            request = self.engine._first_page()
-            print(f"Starting URL: {request['url']}")
-        except Exception as e:
-            print(f"Error getting first page: {e}")
-            return self.engine.results
 
         successful_pages = 0
-        for page in range(1, pages + 1):
-            try:
-                print(f"\n--- Processing page {page} ---")
-                print(f"Request URL: {request['url']}")
-                
-                response = self.engine._get_page(request['url'], request['data'])
-                
-                if not self.engine._is_ok(response):
-                    print(f"Failed to get page {page} (HTTP status issue), stopping search")
-                    break
-                
-                print(f"Response received, length: {len(response.html)} chars")
-                
-                tags = BeautifulSoup(response.html, "html.parser")
-                items = self.engine._filter_results(tags)
-                print(f"Found {len(items)} result items on page")
-                
-                # Store results before collecting them
-                old_results_count = len(self.engine.results)
-                self.engine._collect_results(items)
-                new_results_count = len(self.engine.results)
-                
-                # Get only the new results from this page
-                page_results = self.engine.results[old_results_count:new_results_count]
-                print(f"Added {len(page_results)} results to collection")
+        try:
+            for page in self.engine.iter_pages(query, pages):
+                print(f"\n--- Processed page {page.number} in {page.elapsed:.1f}s ---")
+                print(f"Added {len(page.results)} results to collection")
                 
                 # Save this page's results to CSV
-                self.save_page_results(page_results, page, query)
-                
+                self.save_page_results(page.results, page.number, query)
                 successful_pages += 1
-                
-                # Get next page URL
-                request = self.engine._next_page(tags)
-                print(f"Next page URL: {request['url'] if request['url'] else 'None (end of results)'}")
-                
-                if not request['url']:
-                    print("No more pages available - reached end of results")
-                    break
-                    
-                if page < pages:
-                    delay = random_uniform(*self.engine._delay)
-                    print(f"Waiting {delay:.1f} seconds before next page...")
-                    sleep(delay)
-                    
-            except KeyboardInterrupt:
-                print("\nSearch interrupted by user")
-                break
-            except Exception as e:
-                print(f"Error on page {page}: {e}")
-                import traceback
-                traceback.print_exc()
-                break
+        except KeyboardInterrupt:
+            print("\nSearch interrupted by user")
+        except Exception as e:
+            print(f"Error on page {successful_pages + 1}: {e}")
+            import traceback
+            traceback.print_exc()
         
         print(f"\nProcessed {successful_pages} pages successfully")
         self.cleanup()
@@ -177,31 +124,27 @@ def run_multiple_searches(engine_name, base_filename):
     timeout = config.TIMEOUT + (10 * bool(proxy))
     engine_class = search_engines_dict[engine_name.lower()]
     
+    # One CSV file per strategy, filled as the scheduler interleaves their pages
+    writers = {}
     for i, query in enumerate(search_queries, 1):
-        print(f"\n{'='*60}")
-        print(f"SEARCH STRATEGY {i}/{len(search_queries)}: {query}")
-        print(f"{'='*60}")
-        
-        # Create filename with query identifier  
         safe_query = query.replace('"', '').replace(':', '_').replace('*', 'wildcard').replace(' ', '_')
         filename = f"{base_filename}_{i:02d}_{safe_query}.csv"
-        
-        engine = EnhancedSearchEngine(engine_class, proxy, timeout)
-        
-        try:
-            results = engine.search_with_strategy(query, 50, filename)  # 50 pages per query
-            print(f"Strategy {i} completed: {len(results)} total results")
-            
-            # Wait between different search strategies
-            if i < len(search_queries):
-                wait_time = 30  # 30 seconds between different search terms
-                print(f"Waiting {wait_time} seconds before next search strategy...")
-                time.sleep(wait_time)
-                
-        except Exception as e:
-            print(f"Error in search strategy {i}: {e}")
-            engine.cleanup()
-            continue
+        writers[query] = EnhancedSearchEngine(engine_class, proxy, timeout)
+        writers[query].setup_csv(filename)
+    
+    def save_page(query, engine, page):
+        writers[query].save_page_results(page.results, page.number, query)
+    
+    print(f"Running {len(search_queries)} search strategies")
+    try:
+        results = search_many(
+            search_queries, [engine_name.lower()], 50, save_page, proxy=proxy, timeout=timeout
+        )  # 50 pages per query
+        for i, query in enumerate(search_queries, 1):
+            print(f"Strategy {i} completed: {len(results[(query, engine_name.lower())])} total results")
+    finally:
+        for writer in writers.values():
+            writer.cleanup()
 
 
 def main():
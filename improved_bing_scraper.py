@@ -120,9 +120,8 @@ class ImprovedBingScraper:
                 time.sleep(wait_time)
                 wait_time *= backoff_factor
             except requests.exceptions.ConnectionError as e:
+                # Keep the session, its pool discards the broken connection
                 print(f"Connection error on attempt {attempt} for {url}: {e}")
-                self.session = requests.Session()
-                self.session.headers.update(self.session.headers)
                 time.sleep(wait_time)
                 wait_time *= backoff_factor
             except requests.RequestException as e:
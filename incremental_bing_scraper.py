@@ -2,11 +2,11 @@
 import argparse
 import csv
 import os
-import time
 
 try:
     from search_engines.engines import search_engines_dict
     from search_engines import config
+    from search_engines import SearchScheduler
 except ImportError as e:
     print(f"Error importing search_engines: {e}")
     print("Please ensure search_engines library is installed")
@@ -66,17 +66,13 @@ class IncrementalBingScraper:
         print(f"Searching Bing for: '{query}'")
         print(f"Max pages: {max_pages}")
         
-        # Perform search for specified number of pages
-        results = bing_engine.search(query, max_pages)
-        
-        # Save all results at once (since the library doesn't allow incremental access)
+        # Save each result as soon as its page is parsed
         total_new = 0
-        for i, result in enumerate(results, 1):
+        for record in bing_engine.iter_results(query, max_pages):
+            result = record.item
             url = result.get('link', '')
             if url and url not in self.unique_urls and 'easyapply.co' in url.lower():
                 self.unique_urls.add(url)
-                # Estimate page number (10 results per page)
-                estimated_page = ((i - 1) // 10) + 1
                 row = [
                     query,
                     'Bing',
@@ -84,7 +80,7 @@ class IncrementalBingScraper:
                     url,
                     result.get('title', ''),
                     result.get('text', ''),
-                    estimated_page
+                    record.page
                 ]
                 self.csv_writer.writerow(row)
                 total_new += 1
@@ -119,40 +115,33 @@ def run_multiple_searches():
         "site:*.easyapply.co"
     ]
     
-    total_results = 0
-    
+    # One CSV file per strategy, filled as the scheduler interleaves their pages
+    scheduler = SearchScheduler()
+    scrapers = {}
     for i, query in enumerate(search_queries, 1):
-        print(f"\n{'='*60}")
-        print(f"SEARCH STRATEGY {i}/{len(search_queries)}: {query}")
-        print(f"{'='*60}")
-        
         # Create safe filename
         safe_query = query.replace('"', '').replace(':', '_').replace('*', 'wildcard').replace(' ', '_')
         filename = f"bing_easyapply_{i:02d}_{safe_query}.csv"
+        scrapers[query] = IncrementalBingScraper()
+        scrapers[query].setup_csv(filename)
         
-        scraper = IncrementalBingScraper()
-        
-        try:
-            # Use different page counts for different queries
-            if "site:" in query:
-                max_pages = 50  # Site searches tend to have fewer unique results
-            else:
-                max_pages = 100  # Broader searches might have more
-                
-            results_count = scraper.search_and_save(query, max_pages, filename)
-            total_results += results_count
-            print(f"Strategy {i} completed: {results_count} easyapply.co results saved to {filename}")
-            
-        except Exception as e:
-            print(f"Error in search strategy {i}: {e}")
-        finally:
+        # Use different page counts for different queries
+        if "site:" in query:
+            max_pages = 50  # Site searches tend to have fewer unique results
+        else:
+            max_pages = 100  # Broader searches might have more
+        scheduler.add(query, 'bing', max_pages)
+    
+    def save_page(query, engine, page):
+        scrapers[query].save_results(page.results, query, page.number)
+    
+    scheduler.sink = save_page
+    try:
+        scheduler.run()
+    finally:
+        for scraper in scrapers.values():
             scraper.cleanup()
-        
-        # Wait between different searches to be respectful
-        if i < len(search_queries):
-            wait_time = 10
-            print(f"Waiting {wait_time} seconds before next search...")
-            time.sleep(wait_time)
+    total_results = sum(scraper.results_count for scraper in scrapers.values())
     
     print(f"\n{'='*60}")
     print(f"ALL SEARCHES COMPLETED")
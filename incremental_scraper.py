@@ -68,63 +68,22 @@ class IncrementalSearchEngine:
             print(f"Page {page_num}: No new results found")
     
     def search_incremental(self, query, pages, csv_filename):
-        """Modified search that saves after each page"""
-        from time import sleep
-        from random import uniform as random_uniform
-        from bs4 import BeautifulSoup
-        from search_engines import utils
-        from search_engines.results import SearchResults
-        
+        """Search that saves after each page"""
         # Setup CSV file
         self.setup_csv(csv_filename)
         
         print(f'Searching {self.engine.__class__.__name__} incrementally')
-        self.engine._query = utils.decode_bytes(query)
-        self.engine.results = SearchResults()
-        request = self.engine._first_page()
-
-        for page in range(1, pages + 1):
-            try:
-                print(f"\nProcessing page {page}...")
-                response = self.engine._get_page(request['url'], request['data'])
-                
-                if not self.engine._is_ok(response):
-                    print(f"Failed to get page {page}, stopping search")
-                    break
-                    
-                tags = BeautifulSoup(response.html, "html.parser")
-                items = self.engine._filter_results(tags)
-                
-                # Store results before collecting them
-                old_results_count = len(self.engine.results)
-                self.engine._collect_results(items)
-                new_results_count = len(self.engine.results)
-                
-                # Get only the new results from this page
-                page_results = self.engine.results[old_results_count:new_results_count]
-                
+        try:
+            for page in self.engine.iter_pages(query, pages):
                 # Save this page's results to CSV
-                self.save_page_results(page_results, page)
+                self.save_page_results(page.results, page.number)
                 
-                msg = 'page: {:<8} total links: {}'.format(page, len(self.engine.results))
+                msg = 'page: {:<8} total links: {}'.format(page.number, len(self.engine.results))
                 print(msg)
-                
-                request = self.engine._next_page(tags)
-                if not request['url']:
-                    print("No more pages available")
-                    break
-                    
-                if page < pages:
-                    delay = random_uniform(*self.engine._delay)
-                    print(f"Waiting {delay:.1f} seconds before next page...")
-                    sleep(delay)
-                    
-            except KeyboardInterrupt:
-                print("\nSearch interrupted by user")
-                break
-            except Exception as e:
-                print(f"Error on page {page}: {e}")
-                break
+        except KeyboardInterrupt:
+            print("\nSearch interrupted by user")
+        except Exception as e:
+            print(f"Error during search: {e}")
         
         self.cleanup()
         return self.engine.results
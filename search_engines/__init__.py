@@ -1,5 +1,7 @@
 from .engines import *
 from .results_analyzer import ResultsAnalyzer
+from .scheduler import search_many, SearchScheduler
+from .cassette import Cassette
 
 
 __title__ = 'search_engines'
@@ -18,5 +20,8 @@ __all__ = [
     'Mojeek', 
     'Qwant',
     'Torch',
-    'ResultsAnalyzer'
+    'ResultsAnalyzer',
+    'search_many',
+    'SearchScheduler',
+    'Cassette'
 ]
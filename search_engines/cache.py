@@ -0,0 +1,160 @@
+import os
+import io
+import json
+import hashlib
+from time import time
+from threading import Lock
+from tempfile import NamedTemporaryFile
+
+from . import config as cfg
+from . import utils
+
+
+class HttpCache(object):
+    '''An on-disk HTTP responses cache with per-host TTLs and a LRU size cap.
+    Bodies are stored by content hash, so identical pages are stored once.
+    Files are written atomically, the cache can be shared by concurrent processes.'''
+    def __init__(self, path, max_bytes=cfg.CACHE_MAX_BYTES):
+        '''
+        :param str path: the cache directory
+        :param int max_bytes: optional, the maximum size of the stored bodies
+        '''
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._keys_dir = os.path.join(path, 'keys')
+        self._blobs_dir = os.path.join(path, 'blobs')
+        self._writes = 0
+        self._lock = Lock()
+        for directory in (self._keys_dir, self._blobs_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, method, url, data=None, headers=None):
+        '''Returns the cache key of a request.'''
+        headers = headers or {}
+        parts = [
+            method.upper(), url,
+            json.dumps(sorted((data or {}).items())),
+            headers.get('User-Agent', ''),
+            headers.get('Accept-Language', '')
+        ]
+        return hashlib.sha256(u'\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key, url):
+        '''Returns the cached (status, body, headers) of a key, or None if missing or expired.'''
+        key_path = self._key_path(key)
+        try:
+            with io.open(key_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time() - entry['created'] > self.ttl(url):
+                raise ValueError('expired')
+            with io.open(self._blob_path(entry['blob']), 'r', encoding='utf-8') as f:
+                body = f.read()
+            os.utime(key_path, None)
+        except (IOError, OSError, ValueError, KeyError):
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return entry['http'], body, entry['headers']
+
+    def set(self, key, http, body, headers=None):
+        '''Stores a response.'''
+        data = body.encode('utf-8')
+        blob = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._blob_path(blob)):
+            self._write(self._blob_path(blob), data)
+        entry = {'http': http, 'blob': blob, 'headers': dict(headers or {}), 'created': time()}
+        self._write(self._key_path(key), json.dumps(entry).encode('utf-8'))
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % cfg.CACHE_EVICT_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def ttl(self, url):
+        '''Returns the time to live (seconds) of a URL's responses.'''
+        return cfg.CACHE_TTLS.get(utils.host(url), cfg.CACHE_TTL)
+
+    def hit_ratio(self):
+        '''Returns the ratio of requests served from the cache.'''
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def evict(self):
+        '''Removes the least recently used entries until the bodies fit in `max_bytes`,
+        and the bodies no entry refers to.'''
+        entries = []
+        for name in os.listdir(self._keys_dir):
+            path = os.path.join(self._keys_dir, name)
+            try:
+                with io.open(path, 'r', encoding='utf-8') as f:
+                    entries.append((os.path.getmtime(path), path, json.load(f)['blob']))
+            except (IOError, OSError, ValueError, KeyError):
+                continue
+        entries.sort()
+
+        sizes = {}
+        for blob in set(e[2] for e in entries):
+            try:
+                sizes[blob] = os.path.getsize(self._blob_path(blob))
+            except OSError:
+                continue
+        refs = {}
+        for _, _, blob in entries:
+            refs[blob] = refs.get(blob, 0) + 1
+        total = sum(sizes.values())
+
+        for _, path, blob in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            refs[blob] -= 1
+            if not refs[blob]:
+                total -= sizes.get(blob, 0)
+
+        for name in os.listdir(self._blobs_dir):
+            if not refs.get(name) and not name.startswith('.'):
+                self._remove(os.path.join(self._blobs_dir, name))
+
+    def _count(self, hit):
+        '''Counts cache hits and misses.'''
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _key_path(self, key):
+        '''Returns the path of a cache entry.'''
+        return os.path.join(self._keys_dir, key)
+
+    def _blob_path(self, blob):
+        '''Returns the path of a stored body.'''
+        return os.path.join(self._blobs_dir, blob)
+
+    def _write(self, path, data):
+        '''Writes a file atomically.'''
+        with NamedTemporaryFile(dir=os.path.dirname(path), prefix='.', delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def _remove(self, path):
+        '''Removes a file that another process may have removed.'''
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_caches = {}
+_caches_lock = Lock()
+
+
+def get_cache(path):
+    '''Returns the process-wide cache of a directory.'''
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = HttpCache(path)
+        return _caches[path]
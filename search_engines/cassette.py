@@ -0,0 +1,106 @@
+import gzip
+import json
+import atexit
+from threading import Lock
+from collections import deque
+
+from . import config as cfg
+
+
+## Cassette modes
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class Cassette(object):
+    '''Records HTTP requests and responses to a gzipped JSON lines file, and replays them.
+    Replayed requests are matched by method, URL and form data, in recorded order.'''
+    def __init__(self, path, mode=REPLAY, latency=cfg.CASSETTE_LATENCY):
+        '''
+        :param str path: the cassette file
+        :param str mode: optional, 'record' or 'replay'
+        :param latency: optional, the simulated latency of replayed responses:
+            None for no delay, 'recorded' for the recorded latency, or seconds
+        '''
+        if mode not in (RECORD, REPLAY):
+            raise ValueError('Invalid cassette mode "{}"'.format(mode))
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._entries = {}
+        self._lock = Lock()
+        self._file = None
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+            atexit.register(self.close)
+
+    @property
+    def replaying(self):
+        '''Indicates if the cassette serves the responses.'''
+        return self.mode == REPLAY
+
+    def record(self, method, url, data, response, elapsed):
+        '''Records a request and its response.'''
+        entry = {
+            'method': method, 'url': url, 'data': self._data(data),
+            'http': response.http, 'body': response.html, 'elapsed': round(elapsed, 4),
+            'headers': {
+                k: v for k, v in (response.headers or {}).items()
+                if k.lower() in ('content-type', 'retry-after')
+            }
+        }
+        with self._lock:
+            if self._file:
+                self._file.write(json.dumps(entry) + u'\n')
+
+    def play(self, method, url, data=None):
+        '''Returns the recorded (status, body, headers, latency) of a request,
+        or None if it's not in the cassette. The last match repeats once the others are used.'''
+        key = (method, url, json.dumps(self._data(data)))
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+        return entry['http'], entry['body'], entry['headers'], self._latency(entry)
+
+    def close(self):
+        '''Writes the recorded requests to disk.'''
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _load(self):
+        '''Reads the recorded requests.'''
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                key = (entry['method'], entry['url'], json.dumps(entry['data']))
+                self._entries.setdefault(key, deque()).append(entry)
+
+    def _latency(self, entry):
+        '''Returns the simulated latency of a replayed response.'''
+        if self.latency == 'recorded':
+            return entry['elapsed']
+        return self.latency or 0.0
+
+    @staticmethod
+    def _data(data):
+        '''Returns the form data in a stable order.'''
+        return sorted([list(i) for i in (data or {}).items()])
+
+
+_cassettes = {}
+_cassettes_lock = Lock()
+
+
+def get_cassette(path, mode=REPLAY):
+    '''Returns the process-wide cassette of a file.'''
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path, mode)
+        return _cassettes[path]
@@ -8,21 +8,90 @@ PYTHON_VERSION = version_info.major
 ## Maximum number or pages to search
 SEARCH_ENGINE_RESULTS_PAGES = 20
 
+## Maximum number of search engines that run concurrently 
+SEARCH_ENGINE_WORKERS = 1
+
+## Requests per second, burst size and maximum random extra delay (seconds) per host 
+RATE_LIMIT = {'rate': 0.5, 'burst': 1, 'jitter': 1.5, 'max_rate': 1.0}
+
+## Rate limits of hosts that need slower pacing 
+RATE_LIMITS = {
+    'www.google.com': {'rate': 0.25, 'burst': 1, 'jitter': 2.0, 'max_rate': 0.5}
+}
+
+## Adaptive pacing: rate step after `recovery` consecutive successes, rate factor after a ban, 
+## lowest rate as a ratio of the initial rate, number of recent requests in ban ratio 
+ADAPTIVE_PACING = {'increase': 0.05, 'recovery': 5, 'decrease': 0.5, 'min_ratio': 0.05, 'window': 50}
+
+## Number of worker threads of the batch query scheduler 
+SCHEDULER_WORKERS = 8
+
+## Maximum number of concurrent queries per search engine in the scheduler, and per engine overrides 
+SCHEDULER_ENGINE_LIMIT = 4
+SCHEDULER_ENGINE_LIMITS = {'google': 2}
+
 ## HTTP request timeout 
 TIMEOUT = 10
 
+## Keep-alive connection pools: number of hosts and connections per host 
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 10
+
+## Use HTTP/2, requires `httpx[http2]` 
+HTTP2 = False
+
 ## Default User-Agent string 
 USER_AGENT = 'search_engines/0.5 Repo: https://github.com/tasos-py/Search-Engines-Scraper'
 
 ## Fake User-Agent string - Google desn't like the default user-agent
 FAKE_USER_AGENT = 'Mozilla/5.0 (Windows NT 6.1; rv:84.0) Gecko/20100101 Firefox/84.0'
 
+## HTML parser backend, 'lxml' is faster (pip install search_engines[lxml]) and 
+## falls back to 'html.parser' if it's not installed 
+PARSER = 'html.parser'
+
 ## Proxy server 
 PROXY = None
 
 ## TOR proxy server 
 TOR = 'socks5h://127.0.0.1:9050'
 
+## Base URL overrides per engine name, e.g. {'bing': 'http://127.0.0.1:8000/bing'} for the mock server 
+BASE_URLS = {}
+
+## Upper bounds (seconds) of the search phases timing histograms 
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+## Number of recent requests whose timing metadata is kept per engine 
+REQUEST_HISTORY = 1000
+
+## Maximum redraws per second of the console progress line 
+CONSOLE_REFRESH = 10
+
+## Seconds to wait at exit for the queued console messages 
+CONSOLE_EXIT_TIMEOUT = 5.0
+
+## Port of the local metrics endpoint, None disables it 
+METRICS_PORT = None
+
+## HTTP cache directory, None disables the cache 
+CACHE_DIR = None
+
+## HTTP cache: time to live (seconds) of responses, per host overrides, maximum size (bytes) of 
+## stored pages, and number of writes between evictions 
+CACHE_TTL = 6 * 3600
+CACHE_TTLS = {'www.bing.com': 3600, 'www.google.com': 3600}
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_EVICT_INTERVAL = 100
+
+## HTTP cassette file, None disables recording and replay 
+CASSETTE = None
+
+## HTTP cassette: mode ('record' or 'replay'), and simulated latency of replayed responses 
+## (None for no delay, 'recorded' for the recorded latency, or seconds) 
+CASSETTE_MODE = 'replay'
+CASSETTE_LATENCY = None
+
 _base_dir = os_path.abspath(os_path.dirname(os_path.abspath(__file__)))
 
 ## Path to output files 
@@ -0,0 +1,164 @@
+import sys
+import atexit
+import traceback
+from time import time
+from threading import Thread, Lock
+from collections import OrderedDict
+from queue import Queue, Empty
+
+try:
+    from shutil import get_terminal_size
+except ImportError:
+    from .libs.get_terminal_size import get_terminal_size
+
+from . import config as cfg
+
+
+class Console(object):
+    '''Writes messages and a live progress line from a single background thread.
+    Callers only queue their output, so printing never blocks a search.
+    On a terminal the progress of all running engines shares one status line,
+    redrawn at most `refresh` times per second; otherwise messages are written
+    as plain lines, in batches, and the progress is omitted.'''
+    def __init__(self, stream=None, refresh=cfg.CONSOLE_REFRESH):
+        '''
+        :param stream: optional, the output file, sys.stdout by default
+        :param float refresh: optional, the maximum redraws per second of the progress line
+        '''
+        self.stream = stream
+        self.interval = 1.0 / refresh
+        self._progress = OrderedDict()
+        self._dirty = False
+        self._status = u''
+        self._width = None
+        self._width_time = 0.0
+        self._queue = Queue()
+        self._lock = Lock()
+        self._thread = None
+
+    def write(self, msg):
+        '''Queues a message, it may span several lines.'''
+        self._start()
+        self._queue.put(msg)
+
+    def progress(self, key, text, label=None):
+        '''Sets the progress of a task, e.g. an engine's search.
+        The label prefixes the text when several tasks are shown.'''
+        self._update(key, (label, text))
+
+    def done(self, key):
+        '''Removes the progress of a finished task.'''
+        self._update(key, None)
+
+    def flush(self, timeout=None):
+        '''Waits until the queued messages are written, or for `timeout` seconds.'''
+        if self._thread is not None:
+            with self._queue.all_tasks_done:
+                self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _update(self, key, value):
+        '''Changes the progress line, and wakes the writer.'''
+        with self._lock:
+            if value is None:
+                self._progress.pop(key, None)
+            else:
+                self._progress[key] = value
+            wake = not self._dirty
+            self._dirty = True
+        if wake:
+            self._start()
+            self._queue.put(None)
+
+    def _start(self):
+        '''Starts the writer thread.'''
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='console')
+                self._thread.daemon = True
+                self._thread.start()
+                atexit.register(self.flush, cfg.CONSOLE_EXIT_TIMEOUT)
+
+    def _run(self):
+        '''The writer loop: writes the queued messages and redraws the progress line.'''
+        last_draw = 0.0
+        while True:
+            timeout = max(0.0, last_draw + self.interval - time()) if self._dirty else None
+            items = []
+            try:
+                items.append(self._queue.get(timeout=timeout))
+                while True:
+                    items.append(self._queue.get_nowait())
+            except Empty:
+                pass
+            try:
+                last_draw = self._write([i for i in items if i is not None], last_draw)
+            except OSError:
+                pass  # the stream is closed, e.g. a broken pipe
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write(self, lines, last_draw):
+        '''Writes a batch of messages; returns the time of the latest redraw.'''
+        stream = self.stream or sys.stdout
+        now = time()
+        with self._lock:
+            redraw = self._dirty and (now - last_draw >= self.interval or not self._progress)
+            if redraw:
+                self._dirty = False
+                progress = list(self._progress.values())
+
+        if not _isatty(stream):
+            if lines:
+                stream.write(u'\n'.join(lines) + u'\n')
+                stream.flush()
+            return now if redraw else last_draw
+
+        status = self._render(progress) if redraw else self._status
+        if not lines and status == self._status:
+            return now if redraw else last_draw
+        data = self._clear() if self._status else u''
+        if lines:
+            data += u'\n'.join(lines) + u'\n'
+        stream.write(data + status)
+        stream.flush()
+        self._status = status
+        return now if redraw else last_draw
+
+    def _render(self, progress):
+        '''Returns the progress line, cut to the terminal width.'''
+        if len(progress) == 1:
+            line = progress[0][1]
+        else:
+            line = u' | '.join(
+                u' '.join([label or u''] + text.split()).strip() for label, text in progress
+            )
+        return line[:self._columns() - 1]
+
+    def _clear(self):
+        '''Returns the string that erases the progress line.'''
+        return u'\r{}\r'.format(u' ' * (self._columns() - 1))
+
+    def _columns(self):
+        '''Returns the terminal width, it's read at most once per second.'''
+        now = time()
+        if self._width is None or now - self._width_time > 1.0:
+            self._width = get_terminal_size().columns
+            self._width_time = now
+        return self._width
+
+
+def _isatty(stream):
+    '''Indicates if a stream is a terminal.'''
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+console = Console()
+'''The console of the package.'''
@@ -1,24 +1,40 @@
-from bs4 import BeautifulSoup
-from time import sleep
-from random import uniform as random_uniform
+import asyncio
+import soupsieve
+from time import time
 from collections import namedtuple
+from urllib.parse import urlparse
 
 from .results import SearchResults
-from .http_client import HttpClient
+from .http_client import HttpClient, AsyncHttpClient, latency_summary
+from .parsers import make_soup, ParsedPage
+from .metrics import Metrics
+from .events import EventBus
+from . import events
+from .rate_limiter import get_limiter, parse_retry_after
 from . import utils
 from . import output as out
 from . import config as cfg
 
 
+SearchPage = namedtuple('SearchPage', ['number', 'rank', 'results', 'elapsed', 'request'], defaults=[None])
+'''A results page: its number, the rank of its first new result, the new results, the request time 
+and the RequestInfo of its request.'''
+
+SearchResult = namedtuple('SearchResult', ['page', 'rank', 'item'])
+'''A search result: the page it was found on, its rank and its data.'''
+
+
 class SearchEngine(object):
     '''The base class for all Search Engines.'''
+    _compiled_selectors = {}
+    '''Compiled CSS selectors, shared by all instances of an engine class.'''
+
     def __init__(self, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
         '''
         :param str proxy: optional, a proxy server  
         :param int timeout: optional, the HTTP timeout
         '''
         self._http_client = HttpClient(timeout, proxy) 
-        self._delay = (1, 4)
         self._query = ''
         self._filters = []
 
@@ -30,6 +46,17 @@ class SearchEngine(object):
         '''Collects only unique domains.'''
         self.is_banned = False
         '''Indicates if a ban occured'''
+        self.parser = cfg.PARSER
+        '''The HTML parser backend.'''
+        self.metrics = Metrics(self.__class__.__name__.lower())
+        '''The timings of the search phases and the search events counts.'''
+        self.events = EventBus([events.console], parent=events.bus)
+        '''The search events; engine subscribers, then the process-wide events.bus ones.'''
+        self.events.set_context(engine=self.__class__.__name__)
+        self._http_client.metrics = self.metrics
+        self._http_client.events = self.events
+        self._default_base_url = None
+        self._started = None
 
     def _selectors(self, element):
         '''Returns the appropriate CSS selector.'''
@@ -39,31 +66,56 @@ class SearchEngine(object):
         '''Returns the initial page URL.'''
         raise NotImplementedError()
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data.'''
         raise NotImplementedError()
     
+    def _compiled(self, element):
+        '''Returns the compiled CSS selector, compiling it once per engine class.'''
+        key = (self.__class__, element)
+        pattern = self._compiled_selectors.get(key)
+        if pattern is None:
+            pattern = soupsieve.compile(self._selectors(element))
+            self._compiled_selectors[key] = pattern
+        return pattern
+    
+    def _select(self, tag, element):
+        '''Returns all the tags matching the element's selector.'''
+        return self._compiled(element).select(tag)
+    
+    def _select_one(self, tag, element):
+        '''Returns the first tag matching the element's selector.'''
+        return self._compiled(element).select_one(tag)
+    
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results items.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_one(tag, 'url'), item)
         return utils.unquote_url(url)
     
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
-        selector = self._selectors('title')
-        return self._get_tag_item(tag.select_one(selector), item)
+        return self._get_tag_item(self._select_one(tag, 'title'), item)
     
     def _get_text(self, tag, item='text'):
         '''Returns the text of search results items.'''
-        selector = self._selectors('text')
-        return self._get_tag_item(tag.select_one(selector), item)
+        return self._get_tag_item(self._select_one(tag, 'text'), item)
+    
+    def _get_page(self, page, data=None, validate=False):
+        '''Gets pagination links. Results pages are validated: they're cached 
+        only once _process_page accepts them, other pages as soon as they're received.'''
+        if data:
+            return self._http_client.post(page, data, validate)
+        return self._http_client.get(page, validate)
     
-    def _get_page(self, page, data=None):
-        '''Gets pagination links.'''
+    async def _aget_page(self, client, page, data=None, validate=False):
+        '''Gets pagination links asynchronously.'''
         if data:
-            return self._http_client.post(page, data)
-        return self._http_client.get(page)
+            return await client.post(page, data, validate)
+        return await client.get(page, validate)
+    
+    def _parse(self, html):
+        '''Parses HTML with the engine's parser backend.'''
+        return make_soup(html, self.parser)
     
     def _get_tag_item(self, tag, item):
         '''Returns Tag attributes.'''
@@ -73,9 +125,10 @@ class SearchEngine(object):
 
     def _item(self, link):
         '''Returns a dictionary of the link data.'''
+        url = self._get_url(link)
         return {
-            'host': utils.domain(self._get_url(link)), 
-            'link': self._get_url(link), 
+            'host': utils.domain(url), 
+            'link': url, 
             'title': self._get_title(link).strip(), 
             'text': self._get_text(link).strip()
         } 
@@ -84,11 +137,17 @@ class SearchEngine(object):
         '''Checks if query is contained in the item.'''
         return self._query.lower() in item.lower()
     
-    def _filter_results(self, soup):
+    def _result_tags(self, page):
+        '''Returns the search results nodes of the page.'''
+        return self._select(page.soup, 'links')
+    
+    def _filter_results(self, page):
         '''Processes and filters the search results.''' 
-        tags = soup.select(self._selectors('links'))
-        results = [self._item(l) for l in tags]
-
+        tags = self._result_tags(page)
+        return self._filter_items([self._item(l) for l in tags])
+    
+    def _filter_items(self, results):
+        '''Filters the search results items based on the search operators.'''
         if u'url' in self._filters:
             results = [l for l in results if self._query_in(l['link'])]
         if u'title' in self._filters:
@@ -106,9 +165,9 @@ class SearchEngine(object):
                 continue
             if item in self.results:
                 continue
-            if self.ignore_duplicate_urls and item['link'] in self.results.links():
+            if self.ignore_duplicate_urls and self.results.has_link(item['link']):
                 continue
-            if self.ignore_duplicate_domains and item['host'] in self.results.hosts():
+            if self.ignore_duplicate_domains and self.results.has_host(item['host']):
                 continue
             self.results.append(item)
 
@@ -119,12 +178,53 @@ class SearchEngine(object):
         if response.http == 200:
             return True
         msg = ('HTTP ' + str(response.http)) if response.http else response.html
-        out.console(msg, level=out.Level.error)
+        self._report_failure(response, msg)
         return False
     
+    def _report_failure(self, response, msg):
+        '''Emits a banned or error event for a failed page.'''
+        if self.is_banned:
+            retry_after = parse_retry_after(response.headers)
+            self.events.emit(events.BANNED, message=msg, status=response.http, retry_after=retry_after)
+        else:
+            self.events.emit(events.ERROR, message=msg, status=response.http)
+    
+    def _update_pacing(self, response):
+        '''Adapts the request rate of the engine's host to ban signals.
+        Cached and replayed responses didn't reach the host, they are ignored.'''
+        if response.info is not None and response.info.source != 'network':
+            return
+        limiter = get_limiter(self._base_url)
+        if self.is_banned:
+            limiter.ban(parse_retry_after(response.headers))
+        elif response.http == 200:
+            limiter.success()
+    
+    def pacing(self):
+        '''Returns the live pacing state of the engine's host: 
+        the current rate and the ratio of bans in recent requests.'''
+        return get_limiter(self._base_url).stats()
+    
+    def transfer_stats(self):
+        '''Returns the number of requests and the bytes received (wire) 
+        and decompressed (decoded) by the engine.'''
+        return dict(self._http_client.transfer)
+    
+    def requests_info(self):
+        '''Returns the RequestInfo (timing phases, status, bytes, proxy, redirects) 
+        of the engine's latest requests.'''
+        return list(self._http_client.history)
+    
+    def latency_stats(self, by=None):
+        '''Returns the p50, p95 and p99 of the engine's request phases. 
+        
+        :param by: str Optional, a RequestInfo field to group by, e.g. 'proxy' 
+        '''
+        return latency_summary(self._http_client.history, by)
+    
     def disable_console(self):
-        '''Disables console output'''
-        out.console = lambda msg, end='\n', level=None: None
+        '''Disables the console output of this engine.'''
+        self.events.unsubscribe(events.console)
     
     def set_headers(self, headers):
         '''Sets HTTP headers.
@@ -133,6 +233,25 @@ class SearchEngine(object):
         '''
         self._http_client.session.headers.update(headers)
     
+    def set_base_url(self, url):
+        '''Sends the requests to another server, e.g. the mock server. 
+        The paths of the engine's URLs are appended to `url`.
+        
+        :param url: str The server URL, or None to restore the default 
+        '''
+        if self._default_base_url is None:
+            self._default_base_url = self._base_url
+        parts = urlparse(self._default_base_url)
+        path = self._default_base_url[len(u'{}://{}'.format(parts.scheme, parts.netloc)):]
+        self._base_url = (url.rstrip(u'/') + path) if url else self._default_base_url
+    
+    def set_cassette(self, cassette):
+        '''Records or replays the HTTP requests with a cassette. 
+        
+        :param cassette: Cassette The cassette, or None to use the network 
+        '''
+        self._http_client.cassette = cassette
+    
     def set_search_operator(self, operator):
         '''Filters search results based on the operator. 
         Supported operators: 'url', 'title', 'text', 'host'
@@ -145,61 +264,191 @@ class SearchEngine(object):
         for operator in operators:
             if operator not in supported_operators:
                 msg = u'Ignoring unsupported operator "{}"'.format(operator)
-                out.console(msg, level=out.Level.warning)
+                self.events.emit(events.MESSAGE, level='warning', message=msg)
             else:
                 self._filters += [operator]
     
-    def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+    def _start_search(self, query):
+        '''Resets the search state for a new query.'''
+        self._query = utils.decode_bytes(query)
+        self.results = SearchResults()
+        self._started = time()
+        if self.__class__.__name__.lower() in cfg.BASE_URLS:
+            self.set_base_url(cfg.BASE_URLS[self.__class__.__name__.lower()])
+        self.events.set_context(query=self._query, page=None)
+        with self.metrics.timer('console'):
+            self.events.emit(events.SEARCH_STARTED)
+    
+    def _finish_search(self):
+        '''Reports the end of the search.'''
+        with self.metrics.timer('console'):
+            self.events.emit(events.SEARCH_FINISHED, time() - self._started, results=len(self.results))
+        self.events.set_context(page=None)
+    
+    def _process_page(self, number, response, elapsed):
+        '''Checks, parses and collects a results page. 
+        Returns a SearchPage, or None if the search should stop.'''
+        metrics = self.metrics
+        info = response.info
+        self.events.set_context(page=number)
+        self.events.emit(
+            events.PAGE_FETCHED, elapsed, status=response.http, 
+            url=info.url if info else None, bytes=info.wire if info else None
+        )
+        with metrics.timer('check'):
+            is_ok = self._is_ok(response)
+            self._update_pacing(response)
+        if not is_ok:
+            metrics.count('bans' if self.is_banned else 'errors')
+            return None
+        self._http_client.cache_response(response)
+        start = time()
+        with metrics.timer('parse'):
+            response.parse()
+        rank = len(self.results)
+        with metrics.timer('extract'):
+            items = self._filter_results(response)
+        with metrics.timer('dedup'):
+            self._collect_results(items)
+        new = self.results[rank:]
+        metrics.count('pages')
+        metrics.count('results', len(new))
+        
+        with metrics.timer('console'):
+            for i, item in enumerate(new, rank + 1):
+                self.events.emit(events.RESULT_NEW, rank=i, link=item['link'], host=item['host'])
+            self.events.emit(events.PAGE_PARSED, time() - start, new=len(new), total=len(self.results))
+        return SearchPage(number, rank + 1, new, elapsed, info)
+    
+    def iter_pages(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Queries the search engine and yields each page as soon as it's parsed.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns generator of SearchPage objects
+        '''
+        self._start_search(query)
+        try:
+            with self.metrics.timer('first_page'):
+                request = self._first_page()
+
+            for page in range(1, pages + 1):
+                try:
+                    start = time()
+                    response = self._get_page(request['url'], request['data'], validate=True)
+                    response = ParsedPage(response, self.parser)
+                    search_page = self._process_page(page, response, time() - start)
+                    if search_page is None:
+                        break
+                    yield search_page
+                    with self.metrics.timer('next_page'):
+                        request = self._next_page(response)
+
+                    if not request['url']:
+                        break
+                except KeyboardInterrupt:
+                    break
+        finally:
+            self._finish_search()
+    
+    def iter_results(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Queries the search engine and yields each new result as soon as its page is parsed.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns generator of SearchResult objects
+        '''
+        for page in self.iter_pages(query, pages):
+            for rank, item in enumerate(page.results, page.rank):
+                yield SearchResult(page.number, rank, item)
+    
+    def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, output=None, path=None): 
         '''Queries the search engine, goes through the pages and collects the results.
         
         :param query: str The search query  
         :param pages: int Optional, the maximum number of results pages to search  
+        :param output: str Optional, report formats (csv, json, jsonl, html, parquet) written as pages arrive  
+        :param path: str Optional, the report files path, without extension  
         :returns SearchResults object
         '''
-        out.console('Searching {}'.format(self.__class__.__name__))
-        self._query = utils.decode_bytes(query)
-        self.results = SearchResults()
-        request = self._first_page()
+        name = self.__class__.__name__
+        path = path or self._output_path(query)
+        with out.Report(output, path, query, [name], messages=self.events.message) as report:
+            self._search(query, pages, report)
+        return self.results
+    
+    def _search(self, query, pages, report):
+        '''Collects the results, and writes each page to the report. 
+        Stops when the report is closed, e.g. after an interrupt.'''
+        with self.metrics.timer('search'):
+            for page in self.iter_pages(query, pages):
+                report.write(self, page.results)
+                if report.closed:
+                    break
+    
+    async def aiter_pages(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Queries the search engine asynchronously and yields each page as soon as it's parsed.
+        The _first_page and _next_page hooks may block, so they run in the loop's executor.
+        Requests are paced by the per-host rate limiters.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns async generator of SearchPage objects
+        '''
+        loop = asyncio.get_running_loop()
+        client = AsyncHttpClient(self._http_client)
+        self._start_search(query)
+        try:
+            with self.metrics.timer('first_page'):
+                request = await loop.run_in_executor(None, self._first_page)
 
-        for page in range(1, pages + 1):
-            try:
-                response = self._get_page(request['url'], request['data'])
-                if not self._is_ok(response):
+            for page in range(1, pages + 1):
+                start = time()
+                response = await self._aget_page(client, request['url'], request['data'], validate=True)
+                response = ParsedPage(response, self.parser)
+                search_page = self._process_page(page, response, time() - start)
+                if search_page is None:
                     break
-                tags = BeautifulSoup(response.html, "html.parser")
-                items = self._filter_results(tags)
-                self._collect_results(items)
-                
-                msg = 'page: {:<8} links: {}'.format(page, len(self.results))
-                out.console(msg, end='')
-                request = self._next_page(tags)
+                yield search_page
+                with self.metrics.timer('next_page'):
+                    request = await loop.run_in_executor(None, self._next_page, response)
 
                 if not request['url']:
                     break
-                if page < pages:
-                    sleep(random_uniform(*self._delay))
-            except KeyboardInterrupt:
-                break
-        out.console('', end='')
+        finally:
+            await client.close()
+            self._finish_search()
+    
+    async def asearch(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Queries the search engine asynchronously, goes through the pages and collects the results.
+        
+        :param query: str The search query  
+        :param pages: int Optional, the maximum number of results pages to search  
+        :returns SearchResults object
+        '''
+        with self.metrics.timer('search'):
+            async for _ in self.aiter_pages(query, pages):
+                pass
         return self.results
     
     def output(self, output=out.PRINT, path=None):
         '''Prints search results and/or creates report files.
-        Supported output format: html, csv, json.
+        Supported output formats: html, csv, json, jsonl, parquet.
         
         :param output: str Optional, the output format  
         :param path: str Optional, the file to save the report  
         '''
-        output = (output or '').lower()
-        if not path:
-            path = cfg.os_path.join(cfg.OUTPUT_DIR, u'_'.join(self._query.split()))
-        out.console('')
+        path = path or self._output_path(self._query)
+        self.events.message(u'')
 
-        if out.PRINT in output:
+        if out.PRINT in out.output_formats(output):
             out.print_results([self])
-        if out.HTML in output:
-            out.write_file(out.create_html_data([self]), path + u'.html') 
-        if out.CSV in output:
-            out.write_file(out.create_csv_data([self]), path + u'.csv') 
-        if out.JSON in output:
-            out.write_file(out.create_json_data([self]), path + u'.json')
+        names = [self.__class__.__name__]
+        with out.Report(output, path, self._query, names, messages=self.events.message) as report:
+            report.write(self, self.results)
+        out.flush_console()
+    
+    def _output_path(self, query):
+        '''Returns the default path of the report files.'''
+        query = utils.decode_bytes(query or u'')
+        return cfg.os_path.join(cfg.OUTPUT_DIR, u'_'.join(query.split()))
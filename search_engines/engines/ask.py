@@ -25,9 +25,9 @@ class Ask(SearchEngine):
         url = url_str.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
-        next_page = tags.select_one(self._selectors('next'))
+        next_page = self._select_one(page.soup, 'next')
         url = None
         if next_page:
             url = self._base_url + next_page['href']
@@ -30,10 +30,9 @@ class Bing(SearchEngine):
         url = u'{}/search?q={}&search=&form=QBLH'.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
-        selector = self._selectors('next')
-        next_page = self._get_tag_item(tags.select_one(selector), 'href')
+        next_page = self._get_tag_item(self._select_one(page.soup, 'next'), 'href')
         url = None
         if next_page:
             url = (self._base_url + next_page) 
@@ -25,11 +25,11 @@ class Brave(SearchEngine):
         url = url_str.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         selector = self._selectors('next')
         next_page = [
-            tag for tag in tags.select(selector['tag']) 
+            tag for tag in page.soup.select(selector['tag']) 
             if tag.get_text().strip() == selector['text'] and selector['skip'] not in tag['class']
         ]
         url = None
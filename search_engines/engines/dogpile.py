@@ -26,10 +26,9 @@ class Dogpile(SearchEngine):
         url = u'{}/serp?q={}'.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
-        selector = self._selectors('next')
-        next_page = self._get_tag_item(tags.select_one(selector), 'href')
+        next_page = self._get_tag_item(self._select_one(page.soup, 'next'), 'href')
         url = (self._base_url + next_page) if next_page else None
         return {'url':url, 'data':None}
 
@@ -26,11 +26,11 @@ class Duckduckgo(SearchEngine):
         url = u'{}/html/?q={}'.format(self._base_url, quote_url(self._query, ''))
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         self._current_page += 1
         selector = self._selectors('next').format(page=self._current_page)
-        next_page = self._get_tag_item(tags.select_one(selector), 'href')
+        next_page = self._get_tag_item(page.soup.select_one(selector), 'href')
         url = None
         if next_page:
             url = self._base_url + next_page
@@ -38,8 +38,7 @@ class Duckduckgo(SearchEngine):
 
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results item.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_one(tag, 'url'), item)
 
         if url.startswith(u'/url?q='):
             url = url.replace(u'/url?q=', u'').split(u'&sa=')[0]
@@ -24,10 +24,10 @@ class Duckduckgo(SearchEngine):
         data = {'q':self._query, 'b':'', 'kl':'us-en'} 
         return {'url':self._base_url, 'data':data}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         selector = self._selectors('next')
-        forms = tags.select(selector['forms'])
+        forms = page.soup.select(selector['forms'])
         url, data = None, None
 
         if forms:
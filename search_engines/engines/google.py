@@ -1,7 +1,6 @@
 from ..engine import SearchEngine
 from ..config import PROXY, TIMEOUT
 from ..utils import unquote_url, quote_url
-from bs4 import BeautifulSoup
 
 
 class Google(SearchEngine):
@@ -9,7 +8,7 @@ class Google(SearchEngine):
     def __init__(self, proxy=PROXY, timeout=TIMEOUT):
         super(Google, self).__init__(proxy, timeout)
         self._base_url = 'https://www.google.com'
-        self._delay = (2, 6)
+        self._consent_url = 'https://consent.google.com/save'
         
         self.set_headers({'User-Agent':'Lynx/2.8.6rel.5 libwww-FM/2.14'})
 
@@ -19,7 +18,7 @@ class Google(SearchEngine):
             'url': 'div > a[href]', 
             'title': 'a', 
             'text': 'table',
-            'links': 'item', 
+            'links': 'div a[href^="/url?q="]', 
             'next': 'footer a[href][aria-label="Next page"]'
         }
         return selectors[element]
@@ -27,13 +26,13 @@ class Google(SearchEngine):
     def _first_page(self):
         '''Returns the initial page and query.'''
         url = u'{}/search?q={}'.format(self._base_url, quote_url(self._query, ''))
-        page = self._get_page(url)
+        page = self._get_page(url, validate=True)  # the results page, cached once it's accepted
         self._check_consent(page)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
-        tag = tags.select('table a[href*="start="]')[-1]
+        tag = page.soup.select('table a[href*="start="]')[-1]
         next_page = self._get_tag_item(tag, 'href')
         url = None
 
@@ -43,8 +42,7 @@ class Google(SearchEngine):
 
     def _get_url(self, tag, item='href'):
         '''Returns the URL of search results item.'''
-        selector = self._selectors('url')
-        url = self._get_tag_item(tag.select_one(selector), item)
+        url = self._get_tag_item(self._select_one(tag, 'url'), item)
 
         if url.startswith(u'/url?q='):
             url = url.replace(u'/url?q=', u'').split(u'&sa=')[0]
@@ -52,21 +50,25 @@ class Google(SearchEngine):
 
     def _get_text(self, tag, item='text'):
         '''Returns the text of search results items.'''
-        tag = tag.select_one(self._selectors('text'))
+        tag = self._select_one(tag, 'text')
         return tag.text if tag else ''
 
     def _check_consent(self, page):
         '''Checks if cookies consent is required'''
-        url = 'https://consent.google.com/save'
-        bs = BeautifulSoup(page.html, "html.parser")
+        url = self._consent_url
+        bs = self._parse(page.html)
         consent_form = bs.select('form[action="{}"] input[name]'.format(url))
         if consent_form:
             data = {i['name']:i.get('value') for i in consent_form if i['name'] not in ['set_sc', 'set_aps']}
             page = self._get_page(url, data)
         return page
     
-    def _filter_results(self, soup):
-        '''Processes and filters the search results.''' 
-        tags = [i.find_parent('div').find_parent('div') for i in soup.select('div a[href^="/url?q="]')][:-1]
-        soup = BeautifulSoup(''.join('<item>' + str(i) + '</item>' for i in tags), "html.parser")
-        return super(Google, self)._filter_results(soup)
+    def set_base_url(self, url):
+        '''Sends the requests, and the cookies consent, to another server.'''
+        super(Google, self).set_base_url(url)
+        self._consent_url = (self._base_url + '/consent/save') if url else 'https://consent.google.com/save'
+    
+    def _result_tags(self, page):
+        '''Returns the search results nodes of the page.'''
+        links = self._select(page.soup, 'links')
+        return [i.find_parent('div').find_parent('div') for i in links][:-1]
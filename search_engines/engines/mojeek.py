@@ -25,11 +25,11 @@ class Mojeek(SearchEngine):
         url = u'{}/search?q={}'.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         selector = self._selectors('next')
         next_page = [
-            i['href'] for i in tags.select(selector['href']) 
+            i['href'] for i in page.soup.select(selector['href']) 
             if i.text == selector['text']
         ]
         url = (self._base_url + next_page[0]) if next_page else None
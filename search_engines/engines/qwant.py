@@ -1,5 +1,3 @@
-from json import loads
-
 from ..engine import SearchEngine
 from ..config import PROXY, TIMEOUT
 from ..utils import unquote_url
@@ -28,11 +26,11 @@ class Qwant(SearchEngine):
         url = self._base_url.format(self._query, self._offset)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         self._offset += 10
         url = None
-        status = loads(tags.get_text())['status']
+        status = page.json['status']
         if status == 'success' and self._offset <= self._max_offset:
             url = self._base_url.format(self._query, self._offset)
         return {'url':url, 'data':None}
@@ -49,18 +47,7 @@ class Qwant(SearchEngine):
         '''Returns the text of search results items.'''
         return tag.get(self._selectors('text'), u'')
     
-    def _filter_results(self, soup):
-        '''Processes and filters the search results.''' 
-        tags = loads(soup.get_text())['data']['result']['items']['mainline']
-        tags = [j for i in tags for j in i['items'] if i['type'] != u'ads']
-        results = [self._item(l) for l in tags]
-
-        if u'url' in self._filters:
-            results = [l for l in results if self._query_in(l['link'])]
-        if u'title' in self._filters:
-            results = [l for l in results if self._query_in(l['title'])]
-        if u'text' in self._filters:
-            results = [l for l in results if self._query_in(l['text'])]
-        if u'host' in self._filters:
-            results = [l for l in results if self._query_in(utils.domain(l['link']))]
-        return results
+    def _result_tags(self, page):
+        '''Returns the search results items of the page.'''
+        tags = page.json['data']['result']['items']['mainline']
+        return [j for i in tags for j in i['items'] if i['type'] != u'ads']
@@ -1,8 +1,5 @@
-from bs4 import BeautifulSoup
-
 from ..engine import SearchEngine
 from ..config import PROXY, TIMEOUT, FAKE_USER_AGENT
-from .. import output as out
 
 
 class Startpage(SearchEngine):
@@ -28,7 +25,7 @@ class Startpage(SearchEngine):
     def _first_page(self):
         '''Returns the initial page and query.'''
         response = self._get_page(self._base_url)
-        tags = BeautifulSoup(response.html, "html.parser")
+        tags = self._parse(response.html)
         selector = self._selectors('search_form')
 
         data = {
@@ -39,12 +36,12 @@ class Startpage(SearchEngine):
         url = self._base_url + '/sp/search'
         return {'url':url, 'data':data}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         selector = self._selectors('next')
         forms = [
             form 
-            for form in tags.select(selector['form']) 
+            for form in page.soup.select(selector['form']) 
             if form.get_text(strip=True) == selector['text']
         ]
         url, data = None, None
@@ -58,14 +55,12 @@ class Startpage(SearchEngine):
     
     def _is_ok(self, response):
         '''Checks if the HTTP response is 200 OK.'''
-        soup = BeautifulSoup(response.html, 'html.parser')
-        selector = self._selectors('blocked_form')
-        is_blocked = soup.select_one(selector)
+        is_blocked = self._select_one(response.soup, 'blocked_form')
         
         self.is_banned = response.http in [403, 429, 503] or is_blocked
         
         if response.http == 200 and not is_blocked:
             return True
         msg = 'Banned' if is_blocked else ('HTTP ' + str(response.http)) if response.http else response.html
-        out.console(msg, level=out.Level.error)
+        self._report_failure(response, msg)
         return False
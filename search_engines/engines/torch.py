@@ -1,6 +1,6 @@
 from ..engine import SearchEngine
 from ..config import TOR, TIMEOUT
-from .. import output as out
+from .. import events
 
 
 class Torch(SearchEngine):
@@ -9,7 +9,7 @@ class Torch(SearchEngine):
         super(Torch, self).__init__(proxy, timeout)
         self._base_url = u'http://torchdeedp3i2jigzjdmfpn5ttjhthh5wbmda2rr3jvqjg5p77c54dqd.onion'
         if not proxy:
-            out.console('Torch requires TOR proxy!', level=out.Level.warning)
+            self.events.emit(events.MESSAGE, level='warning', message='Torch requires TOR proxy!')
         self._current_page = 1
     
     def _selectors(self, element):
@@ -29,7 +29,7 @@ class Torch(SearchEngine):
         url = url_str.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
         self._current_page += 1
         url_str = u'{}/search?query={}&page={}'
@@ -26,22 +26,20 @@ class Yahoo(SearchEngine):
         url = url_str.format(self._base_url, self._query)
         return {'url':url, 'data':None}
     
-    def _next_page(self, tags):
+    def _next_page(self, page):
         '''Returns the next page URL and post data (if any)'''
-        selector = self._selectors('next')
-        next_page = self._get_tag_item(tags.select_one(selector), 'href')
+        next_page = self._get_tag_item(self._select_one(page.soup, 'next'), 'href')
         url = self._base_url + next_page if next_page else None
         return {'url':url, 'data':None}
 
     def _get_url(self, link, item='href'):
-        selector = self._selectors('url')
-        url = self._get_tag_item(link.select_one(selector), 'href')
+        url = self._get_tag_item(self._select_one(link, 'url'), 'href')
         url = url.split(u'/RU=')[-1].split(u'/R')[0]
         return unquote_url(url)
 
     def _get_title(self, tag, item='text'):
         '''Returns the title of search results items.'''
-        title = tag.select_one(self._selectors('title'))
+        title = self._select_one(tag, 'title')
         for span in title.select('span'):
             span.decompose()
         return self._get_tag_item(title, item)
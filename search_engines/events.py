@@ -0,0 +1,234 @@
+import io
+import os
+import json
+import atexit
+from time import time
+from threading import Lock
+from collections import namedtuple
+
+from . import output as out
+
+
+## Event types
+SEARCH_STARTED = 'search_started'
+PAGE_FETCHED = 'page_fetched'
+PAGE_PARSED = 'page_parsed'
+RESULT_NEW = 'result_new'
+BANNED = 'banned'
+ERROR = 'error'
+SLEEP = 'sleep'
+MESSAGE = 'message'
+SEARCH_FINISHED = 'search_finished'
+
+
+Event = namedtuple('Event', ['type', 'time', 'engine', 'query', 'page', 'duration', 'data'])
+'''A search event: its type, unix time, engine name, query, page number,
+duration (seconds, or None) and type specific data.'''
+
+
+class EventBus(object):
+    '''Delivers events to subscribers, then to the parent bus.
+    Subscribers are callables that receive an Event.'''
+    def __init__(self, subscribers=None, parent=None):
+        '''
+        :param list subscribers: optional, the initial subscribers
+        :param EventBus parent: optional, a bus that receives all events too
+        '''
+        self.subscribers = list(subscribers or [])
+        self.parent = parent
+        self.context = {'engine': None, 'query': None, 'page': None}
+        '''The engine, query and page of the events.'''
+
+    def subscribe(self, subscriber):
+        '''Adds a subscriber and returns it.'''
+        self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        '''Removes a subscriber.'''
+        self.subscribers = [s for s in self.subscribers if s is not subscriber]
+
+    def set_context(self, **context):
+        '''Updates the engine, query or page of the following events.'''
+        self.context.update(context)
+
+    def emit(self, type, duration=None, page=None, **data):
+        '''Creates and publishes an event.'''
+        event = Event(
+            type, time(), self.context['engine'], self.context['query'],
+            page or self.context['page'], duration, data
+        )
+        self.publish(event)
+        return event
+
+    def message(self, message, level=None):
+        '''Emits a message for the user, level is 'info', 'warning', 'error' or None.'''
+        return self.emit(MESSAGE, level=level, message=message)
+
+    def publish(self, event):
+        '''Delivers an event to the subscribers.'''
+        for subscriber in self.subscribers:
+            subscriber(event)
+        if self.parent is not None:
+            self.parent.publish(event)
+
+
+class ConsoleRenderer(object):
+    '''Prints the search progress, warnings and errors on the console.
+    The progress of concurrent searches shares the console's status line.'''
+    def __call__(self, event):
+        if event.type == SEARCH_STARTED:
+            out.console('Searching {}'.format(event.engine))
+        elif event.type == PAGE_PARSED:
+            msg = 'page: {:<8} links: {}'.format(event.page, event.data['total'])
+            out.progress((event.engine, event.query), msg, event.engine)
+        elif event.type == SEARCH_FINISHED:
+            out.progress((event.engine, event.query))
+        elif event.type in (BANNED, ERROR):
+            out.console(event.data.get('message', event.type), level=out.Level.error)
+        elif event.type == MESSAGE:
+            level = event.data.get('level')
+            out.console(event.data['message'], level=getattr(out.Level, level) if level else None)
+
+
+class JsonlWriter(object):
+    '''Writes events to a JSON lines file.'''
+    def __init__(self, path):
+        '''
+        :param str path: the file, events are appended
+        '''
+        self.path = path
+        self._file = io.open(path, 'a', encoding='utf-8')
+        self._lock = Lock()
+        atexit.register(self.close)
+
+    def __call__(self, event):
+        line = json.dumps(event._asdict(), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + u'\n')
+            if event.type == SEARCH_FINISHED:
+                self._file.flush()
+
+    def close(self):
+        '''Closes the file.'''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SpanExporter(object):
+    '''Writes each search as an OpenTelemetry trace, in the OTLP/JSON format
+    of the collector's file exporter: one ExportTraceServiceRequest per line.
+    A search is a root span, with a child span per page; bans, errors and 
+    sleeps are span events.'''
+    def __init__(self, path, service='search_engines'):
+        '''
+        :param str path: the file, traces are appended
+        :param str service: optional, the service.name resource attribute
+        '''
+        self.path = path
+        self.service = service
+        self._traces = {}
+        self._file = io.open(path, 'a', encoding='utf-8')
+        self._lock = Lock()
+        atexit.register(self.close)
+
+    def __call__(self, event):
+        key = (event.engine, event.query)
+        with self._lock:
+            if event.type == SEARCH_STARTED:
+                self._traces[key] = [self._start(event, 'search', os.urandom(16).hex(), None)]
+                return
+            trace = self._traces.get(key)
+            if trace is None:
+                return
+            root = trace[0]
+            if event.type == PAGE_FETCHED:
+                span = self._start(event, 'page', root['traceId'], root['spanId'])
+                span['startTimeUnixNano'] = _nanos(event.time - (event.duration or 0))
+                span['attributes'] += _attributes({
+                    'search.page': event.page, 'http.status_code': event.data.get('status'),
+                    'http.url': event.data.get('url')
+                })
+                trace.append(span)
+            elif event.type == PAGE_PARSED:
+                self._end(trace[-1], event, {'search.results.new': event.data.get('new')})
+            elif event.type in (BANNED, ERROR, SLEEP):
+                span = trace[-1] if len(trace) > 1 and 'endTimeUnixNano' not in trace[-1] else root
+                data = dict(event.data, duration=event.duration)
+                span['events'].append({
+                    'timeUnixNano': _nanos(event.time), 'name': event.type, 'attributes': _attributes(data)
+                })
+                if event.type in (BANNED, ERROR):
+                    span['status'] = {'code': 2, 'message': event.data.get('message', event.type)}
+            elif event.type == SEARCH_FINISHED:
+                del self._traces[key]
+                for span in trace[1:]:
+                    if 'endTimeUnixNano' not in span:
+                        self._end(span, event)
+                self._end(root, event, {'search.results': event.data.get('results')})
+                self._write(trace)
+
+    def close(self):
+        '''Closes the file.'''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _start(self, event, name, trace_id, parent_id):
+        '''Returns a new span.'''
+        return {
+            'traceId': trace_id, 'spanId': os.urandom(8).hex(), 'parentSpanId': parent_id or '',
+            'name': name, 'kind': 1, 'startTimeUnixNano': _nanos(event.time),
+            'attributes': _attributes({'search.engine': event.engine, 'search.query': event.query}),
+            'events': [], 'status': {'code': 1}
+        }
+
+    def _end(self, span, event, attributes=None):
+        '''Ends a span.'''
+        span['endTimeUnixNano'] = _nanos(event.time)
+        span['attributes'] += _attributes(attributes or {})
+
+    def _write(self, spans):
+        '''Writes a trace.'''
+        if self._file is None:
+            return
+        request = {'resourceSpans': [{
+            'resource': {'attributes': _attributes({'service.name': self.service})},
+            'scopeSpans': [{'scope': {'name': 'search_engines'}, 'spans': spans}]
+        }]}
+        self._file.write(json.dumps(request) + u'\n')
+        self._file.flush()
+
+
+def _nanos(seconds):
+    '''Returns a unix time in nanoseconds, as OTLP/JSON expects it.'''
+    return str(int(seconds * 1e9))
+
+def _attributes(values):
+    '''Returns OTLP key-value attributes, without the None values.'''
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = {'boolValue': value}
+        elif isinstance(value, int):
+            value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            value = {'doubleValue': value}
+        else:
+            value = {'stringValue': str(value)}
+        attributes.append({'key': key, 'value': value})
+    return attributes
+
+
+console = ConsoleRenderer()
+'''The console subscriber of the engines.'''
+
+bus = EventBus()
+'''The process-wide bus, it receives the events of all engines.'''
@@ -1,40 +1,232 @@
+import socket
+from math import ceil
+import asyncio
 import requests
-from collections import namedtuple
+from time import sleep, monotonic, perf_counter
+from collections import namedtuple, deque, OrderedDict
+from urllib.parse import urlparse
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.connection import allowed_gai_family
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import NameResolutionError, NewConnectionError, ConnectTimeoutError
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
-from .config import TIMEOUT, PROXY, USER_AGENT
+from threading import Lock, local
+
+from .config import TIMEOUT, PROXY, USER_AGENT, POOL_CONNECTIONS, POOL_MAXSIZE, HTTP2
+from .rate_limiter import get_limiter
+from .cache import get_cache
+from .cassette import get_cassette
+from . import config as cfg
+from . import events
 from . import utils as utl
 
 
+Transfer = namedtuple('Transfer', ['wire', 'decoded', 'encoding'])
+'''The bytes of a response body as received and after decompression, and its Content-Encoding.'''
+
+RequestInfo = namedtuple('RequestInfo', [
+    'method', 'url', 'status', 'proxy', 'redirects', 'reused', 'source', 
+    'dns', 'connect', 'tls', 'ttfb', 'download', 'total', 'wire', 'decoded'
+])
+'''The metadata of a request: the proxy, the number of redirects, if the connection was reused, 
+the response source (network, cache, cassette), the timing phases (seconds) and the bytes. 
+`dns` is None when the DNS lookup is part of `connect` (httpx). The connection phases add up 
+all redirects, `ttfb` and `download` are the final response's.'''
+
+
 class HttpClient(object):
-    '''Performs HTTP requests. A `requests` wrapper, essentialy'''
+    '''Performs HTTP requests. A `requests` wrapper, essentialy.
+    All clients share one keep-alive connection pool (or HTTP/2 transport per proxy).'''
     def __init__(self, timeout=TIMEOUT, proxy=PROXY):
         self.session = requests.session()
         self.session.proxies = self._set_proxy(proxy)
         self.session.headers['User-Agent'] = USER_AGENT
         self.session.headers['Accept-Language'] = 'en-GB,en;q=0.5'
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.session.mount('http://', _shared_adapter())
+        self.session.mount('https://', _shared_adapter())
 
         self.timeout = timeout
-        self.response = namedtuple('response', ['http', 'html'])
+        self.http2 = HTTP2
+        '''Sends requests with HTTP/2, requires `httpx[http2]`.'''
+        self.response = namedtuple(
+            'response', ['http', 'html', 'headers', 'transfer', 'info', 'cache_key'], defaults=[None, None, None, None]
+        )
+        self.transfer = {'requests': 0, 'wire': 0, 'decoded': 0}
+        '''The total bytes received and decompressed by this client.'''
+        self.cache = get_cache(cfg.CACHE_DIR) if cfg.CACHE_DIR else None
+        '''The HTTP cache, or None.'''
+        self.cassette = get_cassette(cfg.CASSETTE, cfg.CASSETTE_MODE) if cfg.CASSETTE else None
+        '''The HTTP cassette that records or replays requests, or None.'''
+        self.metrics = None
+        '''The Metrics that record the pacing, cache and network time, or None.'''
+        self.history = deque(maxlen=cfg.REQUEST_HISTORY)
+        '''The RequestInfo of the latest requests.'''
+        self.events = None
+        '''The EventBus that receives the sleep events, or None.'''
+        self._http2_session = None
 
-    def get(self, page):
-        '''Submits a HTTP GET request.'''
-        page = self._quote(page)
-        try:
-            req = self.session.get(page, timeout=self.timeout)
-            self.session.headers['Referer'] = page
-        except requests.exceptions.RequestException as e:
-            return self.response(http=0, html=e.__doc__)
-        return self.response(http=req.status_code, html=req.text)
+    def get(self, page, validate=False):
+        '''Submits a HTTP GET request.
+        
+        :param bool validate: optional, the response is cached once it's passed to cache_response(), 
+        otherwise a 200 response is cached right away
+        '''
+        return self._request('GET', page, validate=validate)
     
-    def post(self, page, data):
+    def post(self, page, data, validate=False):
         '''Submits a HTTP POST request.'''
+        return self._request('POST', page, data, validate)
+    
+    def _request(self, method, page, data=None, validate=False):
+        '''Submits a HTTP request.'''
         page = self._quote(page)
+        if self.cassette and self.cassette.replaying:
+            response, latency = self._from_cassette(method, page, data)
+            if latency:
+                sleep(latency)
+            self._observe('network', latency)
+            return self._log(response)
+        start = monotonic()
+        key, response = self._from_cache(method, page, data)
+        if self.cache:
+            self._observe('cache', monotonic() - start)
+        start = monotonic()
+        if not response:
+            self._wait(get_limiter(page).acquire(), page)
+            start = monotonic()
+            response = self._cacheable(key, self._send(method, page, data), validate)
+            self._observe('network', monotonic() - start)
+        response = self._to_cassette(method, page, data, response, monotonic() - start)
+        return self._log(response)
+    
+    def _observe(self, phase, seconds):
+        '''Records the duration of a request phase in the engine's metrics.'''
+        if self.metrics is not None:
+            self.metrics.observe(phase, seconds)
+    
+    def _send(self, method, page, data=None):
+        '''Sends a HTTP request to the server.'''
+        timing = _Timing(method, page, self._proxy(page))
         try:
-            req = self.session.post(page, data, timeout=self.timeout)
+            if self.http2:
+                req = self._http2().request(
+                    method, page, data=data, headers=dict(self.session.headers), 
+                    extensions={'trace': timing.trace}
+                )
+            else:
+                _timings.current = timing
+                try:
+                    req = self.session.request(method, page, data=data, timeout=self.timeout)
+                finally:
+                    _timings.current = None
             self.session.headers['Referer'] = page
-        except requests.exceptions.RequestException as e:
-            return self.response(http=0, html=e.__doc__)
-        return self.response(http=req.status_code, html=req.text)
+        except _request_errors as e:
+            return self.response(http=0, html=e.__doc__, info=timing.info(0))
+        transfer = self._account(req)
+        info = timing.info(req.status_code, req, transfer)
+        return self.response(
+            http=req.status_code, html=req.text, headers=req.headers, transfer=transfer, info=info
+        )
+    
+    def _log(self, response):
+        '''Keeps the request metadata in the history.'''
+        if response.info is not None:
+            self.history.append(response.info)
+        return response
+    
+    def _wait(self, seconds, page):
+        '''Records the time the rate limiter held a request.'''
+        self._observe('pacing', seconds)
+        if seconds > 0 and self.events is not None:
+            self.events.emit(events.SLEEP, seconds, url=page)
+    
+    def _proxy(self, url):
+        '''Returns the proxy of a URL, without credentials.'''
+        proxy = (self.session.proxies or {}).get(urlparse(url).scheme)
+        if not proxy:
+            return None
+        parts = urlparse(proxy)
+        return u'{}://{}'.format(parts.scheme, parts.netloc.rpartition('@')[2])
+    
+    def _from_cassette(self, method, page, data=None):
+        '''Returns the replayed response of a request and its simulated latency.'''
+        played = self.cassette.play(method, page, data)
+        if played is None:
+            return self.response(http=0, html='Request not found in cassette.'), 0.0
+        http, html, headers, latency = played
+        self.session.headers['Referer'] = page
+        transfer = Transfer(0, len(utl.encode_str(html)), 'cassette')
+        info = _Timing(method, page, None, 'cassette').info(http, transfer=transfer, total=latency)
+        return self.response(http=http, html=html, headers=headers, transfer=transfer, info=info), latency
+    
+    def _to_cassette(self, method, page, data, response, elapsed):
+        '''Records a response in the cassette.'''
+        if self.cassette:
+            self.cassette.record(method, page, data, response, elapsed)
+        return response
+    
+    def _from_cache(self, method, page, data=None):
+        '''Returns the cache key and the cached response (or None) of a request.'''
+        if not self.cache:
+            return None, None
+        key = self.cache.key(method, page, data, self.session.headers)
+        cached = self.cache.get(key, page)
+        if not cached:
+            return key, None
+        http, html, headers = cached
+        self.session.headers['Referer'] = page
+        transfer = Transfer(0, len(utl.encode_str(html)), 'cache')
+        info = _Timing(method, page, None, 'cache').info(http, transfer=transfer)
+        return key, self.response(http=http, html=html, headers=headers, transfer=transfer, info=info)
+    
+    def _cacheable(self, key, response, validate=False):
+        '''Caches a successful response, or attaches its cache key if it must be validated first.'''
+        if key and response.http == 200:
+            response = response._replace(cache_key=key)
+            if not validate:
+                self.cache_response(response)
+        return response
+    
+    def cache_response(self, response):
+        '''Stores a response in the cache. Engines call it once they accept a page, 
+        so that ban and captcha pages served with a 200 are never cached.'''
+        key = getattr(response, 'cache_key', None)
+        if self.cache and key:
+            headers = {'Content-Type': (response.headers or {}).get('Content-Type', '')}
+            self.cache.set(key, response.http, response.html, headers)
+    
+    def _account(self, req):
+        '''Records the bytes of a `requests` or `httpx` response body.'''
+        decoded = len(req.content)
+        if hasattr(req, 'num_bytes_downloaded'):
+            wire = req.num_bytes_downloaded
+        else:
+            wire = req.raw.tell() if hasattr(req.raw, 'tell') else decoded
+        transfer = Transfer(wire, decoded, req.headers.get('Content-Encoding', 'identity'))
+        self.transfer['requests'] += 1
+        self.transfer['wire'] += transfer.wire
+        self.transfer['decoded'] += transfer.decoded
+        return transfer
+    
+    def _http2(self):
+        '''Returns the HTTP/2 client, creating it on first use.'''
+        if self._http2_session is None:
+            if httpx is None:
+                raise ImportError('HTTP/2 requires `httpx[http2]`, please install it.')
+            proxies = self.session.proxies or {}
+            self._http2_session = httpx.Client(
+                transport=_shared_transport(proxies.get('https')), 
+                cookies=self.session.cookies, 
+                timeout=self.timeout, 
+                follow_redirects=True
+            )
+        return self._http2_session
     
     def _quote(self, url):
         '''URL-encodes URLs.'''
@@ -50,3 +242,342 @@ class HttpClient(object):
             proxy = {'http':proxy, 'https':proxy}
         return proxy
 
+
+
+class AsyncHttpClient(object):
+    '''Performs asynchronous HTTP requests. A `httpx` wrapper that shares 
+    headers, cookies, proxies and the HTTP/2 setting with a HttpClient.'''
+    def __init__(self, http_client):
+        if httpx is None:
+            raise ImportError('AsyncHttpClient requires `httpx`, please install it.')
+        self._http_client = http_client
+        self.session = None
+        self.timeout = http_client.timeout
+        self.response = http_client.response
+
+    async def get(self, page, validate=False):
+        '''Submits a HTTP GET request, see HttpClient.get().'''
+        return await self._request('GET', page, validate=validate)
+    
+    async def post(self, page, data, validate=False):
+        '''Submits a HTTP POST request.'''
+        return await self._request('POST', page, data, validate)
+    
+    async def close(self):
+        '''Closes the underlying connections.'''
+        if self.session is not None:
+            await self.session.aclose()
+            self.session = None
+    
+    async def _request(self, method, page, data=None, validate=False):
+        '''Submits a HTTP request with the HttpClient's headers and cookies.'''
+        client = self._http_client
+        page = client._quote(page)
+        if client.cassette and client.cassette.replaying:
+            response, latency = client._from_cassette(method, page, data)
+            if latency:
+                await asyncio.sleep(latency)
+            client._observe('network', latency)
+            return client._log(response)
+        start = monotonic()
+        key, response = client._from_cache(method, page, data)
+        if client.cache:
+            client._observe('cache', monotonic() - start)
+        start = monotonic()
+        if not response:
+            client._wait(await get_limiter(page).aacquire(), page)
+            start = monotonic()
+            response = client._cacheable(key, await self._send(method, page, data), validate)
+            client._observe('network', monotonic() - start)
+        response = client._to_cassette(method, page, data, response, monotonic() - start)
+        return client._log(response)
+    
+    async def _send(self, method, page, data=None):
+        '''Sends a HTTP request to the server. Like HttpClient, failed requests 
+        return a response with http=0, e.g. a SOCKS proxy without `httpx[socks]`.'''
+        headers = dict(self._http_client.session.headers)
+        timing = _Timing(method, page, self._http_client._proxy('https://'))
+        try:
+            session = self._session()
+            req = await session.request(
+                method, page, data=data, headers=headers, extensions={'trace': timing.atrace}
+            )
+            self._http_client.session.headers['Referer'] = page
+        except ImportError as e:
+            return self.response(http=0, html=u'{}'.format(e), info=timing.info(0))
+        except _httpx_errors as e:
+            return self.response(http=0, html=e.__doc__, info=timing.info(0))
+        transfer = self._http_client._account(req)
+        info = timing.info(req.status_code, req, transfer)
+        return self.response(
+            http=req.status_code, html=req.text, headers=req.headers, transfer=transfer, info=info
+        )
+
+    def _session(self):
+        '''Returns the httpx client, creating it on first use.'''
+        if self.session is None:
+            proxies = self._http_client.session.proxies or {}
+            self.session = httpx.AsyncClient(
+                proxy=proxies.get('https'), 
+                cookies=self._http_client.session.cookies, 
+                http2=self._http_client.http2, 
+                limits=httpx.Limits(max_keepalive_connections=POOL_MAXSIZE), 
+                timeout=self.timeout, 
+                follow_redirects=True
+            )
+        return self.session
+
+
+class _Timing(object):
+    '''Collects the timing phases of a request, from the urllib3 connections 
+    of the current thread or from httpx trace events.'''
+    def __init__(self, method, url, proxy=None, source='network'):
+        self.method = method
+        self.url = url
+        self.proxy = proxy
+        self.source = source
+        self.phases = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        self.new_connection = False
+        self.start = perf_counter()
+        self._sent = None
+        self._setup = 0.0
+        self._headers = None
+        self._started = {}
+
+    def add(self, phase, seconds):
+        '''Adds the duration of a connection phase.'''
+        self.phases[phase] += seconds
+        self.new_connection = True
+
+    def sending(self):
+        '''Marks the start of a request exchange; after redirects, the last one is the final response's.'''
+        self._sent = perf_counter()
+        self._setup = self._setup_time()
+
+    def received(self):
+        '''Marks the arrival of the response headers.'''
+        self._headers = perf_counter()
+
+    def trace(self, event, info):
+        '''Receives the httpx (httpcore) trace events.'''
+        name, _, state = event.rpartition('.')
+        now = perf_counter()
+        if state == 'started':
+            if name.endswith('send_request_headers'):
+                self.sending()
+            self._started[name] = now
+        elif state == 'complete':
+            if name.endswith('connect_tcp'):
+                self.phases['dns'] = None
+                self.add('connect', now - self._started.get(name, now))
+            elif name.endswith('start_tls'):
+                self.add('tls', now - self._started.get(name, now))
+            elif name.endswith('receive_response_headers'):
+                self.received()
+
+    async def atrace(self, event, info):
+        '''Receives the httpx trace events of async requests.'''
+        self.trace(event, info)
+
+    def info(self, status, req=None, transfer=None, total=None):
+        '''Returns the RequestInfo of the request, call it once the body is read.'''
+        end = perf_counter()
+        total = (end - self.start) if total is None else total
+        ttfb = download = None
+        if req is not None and self._headers is not None and self._sent is not None:
+            ttfb = max(0.0, self._headers - self._sent - (self._setup_time() - self._setup))
+            download = max(0.0, end - self._headers)
+        phases = self.phases if self.new_connection else dict.fromkeys(self.phases)
+        return RequestInfo(
+            self.method, self.url, status, self.proxy, len(getattr(req, 'history', None) or []), 
+            self.source == 'network' and not self.new_connection, self.source, 
+            phases['dns'], phases['connect'], phases['tls'], ttfb, download, total, 
+            transfer.wire if transfer else 0, transfer.decoded if transfer else 0
+        )
+
+    def _setup_time(self):
+        '''Returns the time spent setting up connections so far.'''
+        return sum(v for v in self.phases.values() if v)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    '''A urllib3 connection that records its DNS lookup and connect time.
+    The host is resolved with the connection's settings, then urllib3 connects 
+    to each address in turn, until one accepts the connection.'''
+    def _new_conn(self):
+        timing = getattr(_timings, 'current', None)
+        if timing is None:
+            return super(_TimedHTTPConnection, self)._new_conn()
+        host = self._dns_host
+        start = perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            timing.add('dns', perf_counter() - start)
+        if not addresses:
+            return super(_TimedHTTPConnection, self)._new_conn()
+
+        start = perf_counter()
+        try:
+            for address in OrderedDict.fromkeys(a[4][0] for a in addresses):
+                self._dns_host = address
+                try:
+                    return super(_TimedHTTPConnection, self)._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+            timing.add('connect', perf_counter() - start)
+
+
+class _TimedHTTPSConnection(_TimedHTTPConnection, HTTPSConnection):
+    '''A urllib3 TLS connection that records its DNS lookup, connect and handshake time.'''
+    def connect(self):
+        timing = getattr(_timings, 'current', None)
+        if timing is None:
+            return super(_TimedHTTPSConnection, self).connect()
+        before = timing.phases['dns'] + timing.phases['connect']
+        start = perf_counter()
+        super(_TimedHTTPSConnection, self).connect()
+        setup = timing.phases['dns'] + timing.phases['connect'] - before
+        timing.add('tls', max(0.0, perf_counter() - start - setup))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(requests.adapters.HTTPAdapter):
+    '''A `requests` adapter whose connections record their setup phases.
+    SOCKS proxies keep their own connections, their setup time is part of the TTFB.'''
+    _pool_classes = {'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+
+    def send(self, request, **kwargs):
+        timing = getattr(_timings, 'current', None)
+        if timing is not None:
+            timing.sending()
+        response = super(_TimedAdapter, self).send(request, **kwargs)
+        if timing is not None:
+            timing.received()
+        return response
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_TimedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super(_TimedAdapter, self).proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith('socks'):
+            manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+
+class _SharedAdapter(requests.adapters.BaseAdapter):
+    '''A session's reference to the process-wide adapter. Closing a session releases 
+    its references; the connection pools are closed with the last reference.'''
+    def __init__(self):
+        global _adapter, _references
+        super(_SharedAdapter, self).__init__()
+        with _lock:
+            if _adapter is None:
+                _adapter = _TimedAdapter(
+                    pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE
+                )
+            _references += 1
+            self.adapter = _adapter
+        self._closed = False
+
+    def send(self, request, **kwargs):
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        global _adapter, _references
+        with _lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.adapter is not _adapter:
+                return
+            _references -= 1
+            if not _references:
+                _adapter = None
+                self.adapter.close()
+
+
+_httpx_errors = (httpx.HTTPError, httpx.InvalidURL, httpx.StreamError) if httpx else ()
+_request_errors = (requests.exceptions.RequestException,) + _httpx_errors
+_adapter = None
+_references = 0
+_transports = {}
+_lock = Lock()
+_timings = local()
+
+
+def _shared_adapter():
+    '''Returns a reference to the process-wide `requests` adapter and its keep-alive connection pools.'''
+    return _SharedAdapter()
+
+def _shared_transport(proxy=None):
+    '''Returns the process-wide HTTP/2 transport of a proxy.'''
+    with _lock:
+        if proxy not in _transports:
+            _transports[proxy] = httpx.HTTPTransport(
+                http2=True, proxy=proxy, 
+                limits=httpx.Limits(max_keepalive_connections=POOL_MAXSIZE)
+            )
+        return _transports[proxy]
+
+def connection_stats():
+    '''Returns the requests and new connections per host of the shared connection pools.
+    Reused connections are requests minus new connections.'''
+    stats = {}
+    managers = [_adapter.poolmanager] + list(_adapter.proxy_manager.values()) if _adapter else []
+    for manager in managers:
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            host = stats.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0})
+            host['requests'] += pool.num_requests
+            host['connections'] += pool.num_connections
+            host['reused'] = max(0, host['requests'] - host['connections'])
+    return stats
+
+def percentile(values, p):
+    '''Returns the nearest-rank percentile of values.'''
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(0, int(ceil(p / 100.0 * len(values))) - 1)]
+
+def latency_summary(records, key=None):
+    '''Returns the p50, p95 and p99 of the request phases, per group of records.
+
+    :param records: iterable of RequestInfo
+    :param key: optional, a callable or RequestInfo field name that groups the records, e.g. 'proxy'
+    :returns dict of {group: {'requests': count, phase: {'p50', 'p95', 'p99'}}}
+    '''
+    if isinstance(key, str):
+        field = key
+        key = lambda record: getattr(record, field)
+    groups = {}
+    for record in records:
+        groups.setdefault(key(record) if key else 'all', []).append(record)
+
+    summary = {}
+    for group, items in groups.items():
+        network = [i for i in items if i.source == 'network']
+        summary[group] = {'requests': len(items)}
+        for phase in ('dns', 'connect', 'tls', 'ttfb', 'download', 'total'):
+            values = [getattr(i, phase) for i in network if getattr(i, phase) is not None]
+            summary[group][phase] = {
+                'p50': percentile(values, 50), 'p95': percentile(values, 95), 'p99': percentile(values, 99)
+            }
+    return summary
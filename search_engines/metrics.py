@@ -0,0 +1,180 @@
+import json
+from time import perf_counter
+from threading import Thread, Lock
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import config as cfg
+
+
+class Histogram(object):
+    '''Counts observations in cumulative buckets, Prometheus style.'''
+    def __init__(self, buckets=cfg.METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        '''Adds an observation.'''
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self):
+        '''Returns the histogram as a dictionary.'''
+        return {
+            'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+            'buckets': {str(b): c for b, c in zip(self.buckets, self.counts)}
+        }
+
+
+class Metrics(object):
+    '''Per-phase timers and event counters of an engine's searches. Thread safe.
+    Metrics accumulate over the engine's searches, until reset().'''
+    def __init__(self, name):
+        '''
+        :param str name: the engine name, the `engine` label in Prometheus
+        '''
+        self.name = name
+        self.phases = {}
+        '''Histogram of durations (seconds) per phase.'''
+        self.counters = {}
+        '''Count per event: pages, results, bans, errors.'''
+        self.hooks = []
+        '''Callables that receive (name, phase, seconds) for each timed phase.'''
+        self._lock = Lock()
+
+    @contextmanager
+    def timer(self, phase):
+        '''Times a block of code as a phase.'''
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, perf_counter() - start)
+
+    def observe(self, phase, seconds):
+        '''Records the duration of a phase.'''
+        with self._lock:
+            if phase not in self.phases:
+                self.phases[phase] = Histogram()
+            self.phases[phase].observe(seconds)
+        for hook in self.hooks:
+            hook(self.name, phase, seconds)
+
+    def count(self, event, value=1):
+        '''Increments an event counter.'''
+        with self._lock:
+            self.counters[event] = self.counters.get(event, 0) + value
+
+    def reset(self):
+        '''Discards all measurements.'''
+        with self._lock:
+            self.phases = {}
+            self.counters = {}
+
+    def to_dict(self):
+        '''Returns the metrics as a dictionary.'''
+        with self._lock:
+            return {
+                'engine': self.name,
+                'phases': {k: v.to_dict() for k, v in self.phases.items()},
+                'counters': dict(self.counters)
+            }
+
+    def to_json(self, indent=None):
+        '''Returns the metrics as JSON.'''
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self):
+        '''Returns the metrics in the Prometheus text format.'''
+        return to_prometheus([self])
+
+
+def to_prometheus(metrics):
+    '''Returns the metrics of several engines in the Prometheus text format.'''
+    lines = [
+        '# HELP search_engines_phase_seconds Time spent in each search phase.',
+        '# TYPE search_engines_phase_seconds histogram'
+    ]
+    counters = [
+        '# HELP search_engines_events_total Search events: pages, results, bans, errors.',
+        '# TYPE search_engines_events_total counter'
+    ]
+    for m in metrics:
+        data = m.to_dict()
+        for phase, hist in sorted(data['phases'].items()):
+            labels = 'engine="{}",phase="{}"'.format(m.name, phase)
+            for bound, count in hist['buckets'].items():
+                lines.append('search_engines_phase_seconds_bucket{{{},le="{}"}} {}'.format(labels, bound, count))
+            lines.append('search_engines_phase_seconds_bucket{{{},le="+Inf"}} {}'.format(labels, hist['count']))
+            lines.append('search_engines_phase_seconds_sum{{{}}} {}'.format(labels, hist['sum']))
+            lines.append('search_engines_phase_seconds_count{{{}}} {}'.format(labels, hist['count']))
+        for event, value in sorted(data['counters'].items()):
+            counters.append('search_engines_events_total{{engine="{}",event="{}"}} {}'.format(m.name, event, value))
+    return '\n'.join(lines + counters) + '\n'
+
+
+class MetricsServer(object):
+    '''Serves live metrics on a local HTTP endpoint: /metrics (Prometheus) and /metrics.json.'''
+    def __init__(self, source, port=cfg.METRICS_PORT, host='127.0.0.1'):
+        '''
+        :param source: a callable that returns the Metrics objects to serve
+        :param int port: optional, the port, 0 picks a free one
+        :param str host: optional, the interface to listen on
+        '''
+        self.source = source
+        handler = type('Handler', (_MetricsHandler,), {'source': staticmethod(source)})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        '''The metrics URL.'''
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/metrics'.format(host, port)
+
+    def start(self):
+        '''Starts serving in a background thread.'''
+        self._thread = Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''Stops the server.'''
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    '''Renders the metrics of the source.'''
+    source = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/metrics.json':
+            body = json.dumps([m.to_dict() for m in self.source()])
+            content_type = 'application/json'
+        elif self.path.split('?')[0] == '/metrics':
+            body = to_prometheus(self.source())
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,567 @@
+'''A local HTTP server that emulates the search engines, for load tests without network access.
+
+Each engine is served under its own path, e.g. http://127.0.0.1:8000/bing, in the markup
+its selectors expect. Point engines at it with `SearchEngine.set_base_url()` or config.BASE_URLS:
+
+    with MockSerpServer(latency=('lognormal', -2.0, 0.5), burst_every=20) as server:
+        config.BASE_URLS.update(server.base_urls())
+        Bing().search('query')
+
+Run it standalone with `python -m search_engines.mock_server -port 8000`.
+'''
+import json
+import random
+import argparse
+from time import sleep, monotonic
+from html import escape
+from threading import Thread, Lock
+from collections import deque, namedtuple
+from urllib.parse import urlparse, parse_qsl, quote, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+
+
+MockRequest = namedtuple('MockRequest', ['method', 'path', 'params', 'cookies', 'base'])
+'''A request to an engine: the method, the path below the engine, the query and form
+parameters, the cookies and the absolute URL of the engine.'''
+
+MockResponse = namedtuple('MockResponse', ['status', 'body', 'content_type', 'headers'])
+MockResponse.__new__.__defaults__ = ('text/html; charset=utf-8', {})
+
+_page = u'<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>'
+
+
+class MockSerpServer(object):
+    '''Serves paginated result pages for every engine, with configurable latency,
+    429/503 bursts, a per-engine rate limit and captcha pages.'''
+    def __init__(self, host='127.0.0.1', port=0, pages=5, results=10, latency=None,
+                 burst_every=0, burst_length=3, burst_status=429, retry_after=None,
+                 max_rate=None, captcha_rate=0.0, consent=True, seed=None):
+        '''
+        :param str host: optional, the interface to listen on
+        :param int port: optional, the port, 0 picks a free one
+        :param int pages: optional, the number of results pages per query
+        :param int results: optional, the number of results per page
+        :param latency: optional, the response delay: None, seconds, or a distribution
+            ('uniform', low, high), ('normal', mean, sigma), ('lognormal', mu, sigma), ('exponential', mean)
+        :param int burst_every: optional, the last `burst_length` of every `burst_every` requests
+            to an engine fail with `burst_status`, 0 disables bursts
+        :param int burst_length: optional, the number of failed requests per burst
+        :param int burst_status: optional, the HTTP status of failed requests (429, 503)
+        :param float retry_after: optional, the Retry-After seconds of failed requests
+        :param float max_rate: optional, the requests per second per engine above which
+            requests fail with HTTP 429
+        :param float captcha_rate: optional, the probability of serving a captcha page
+        :param bool consent: optional, Google asks for cookies consent first
+        :param int seed: optional, the random seed of latencies and captchas
+        '''
+        self.pages = pages
+        self.results = results
+        self.latency = latency
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.burst_status = burst_status
+        self.retry_after = retry_after
+        self.max_rate = max_rate
+        self.captcha_rate = captcha_rate
+        self.consent = consent
+        self.requests = {}
+        '''The number of requests per engine.'''
+        self.failures = {}
+        '''The number of injected errors and captchas per engine.'''
+
+        self._random = random.Random(seed)
+        self._recent = {}
+        self._lock = Lock()
+        self._renderers = {
+            'google': self._google, 'bing': self._bing, 'bingfixed': self._bing,
+            'yahoo': self._yahoo, 'aol': self._aol, 'duckduckgo': self._duckduckgo,
+            'startpage': self._startpage, 'dogpile': self._dogpile, 'ask': self._ask,
+            'mojeek': self._mojeek, 'qwant': self._qwant, 'brave': self._brave,
+            'torch': self._torch, 'metager': self._metager
+        }
+        handler = type('Handler', (_Handler,), {'mock': self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        '''The server URL.'''
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def base_urls(self):
+        '''Returns the base URL of every engine, for config.BASE_URLS.'''
+        return {name: '{}/{}'.format(self.url, name) for name in self._renderers}
+
+    def start(self):
+        '''Starts serving in a background thread.'''
+        self._thread = Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''Stops the server.'''
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def results_page(self, engine, query, page=1):
+        '''Returns an engine's results page of a query, without latency or failures,
+        e.g. to save parser fixtures.'''
+        offset = (page - 1) * self.results
+        params = {
+            'google': ('/search', {'q': query, 'start': offset}),
+            'bing': ('/search', {'q': query, 'first': offset + 1}),
+            'bingfixed': ('/search', {'q': query, 'first': offset + 1}),
+            'yahoo': ('/search', {'p': query, 'b': offset + 1}),
+            'aol': ('/aol/search', {'q': query, 'b': offset + 1}),
+            'duckduckgo': ('/html/', {'q': query, 's': offset}),
+            'startpage': ('/sp/search', {'query': query, 'page': page}),
+            'dogpile': ('/serp', {'q': query, 'page': page}),
+            'ask': ('/web', {'q': query, 'page': page}),
+            'mojeek': ('/search', {'q': query, 's': offset + 1}),
+            'qwant': ('/v3/search/web', {'q': query, 'count': self.results, 'offset': offset}),
+            'brave': ('/search', {'q': query, 'offset': page - 1}),
+            'torch': ('/search', {'query': query, 'page': page}),
+            'metager': ('/meta/results', {'eingabe': query, 'page': page})
+        }
+        path, params = params[engine]
+        params = {k: str(v) for k, v in params.items()}
+        request = MockRequest('GET', path, params, {'CONSENT': 'YES+'}, '{}/{}'.format(self.url, engine))
+        return self._renderers[engine](request)
+
+    def handle(self, engine, request):
+        '''Returns the response of an engine's request, or an injected failure.'''
+        delay = self._delay()
+        if delay > 0:
+            sleep(delay)
+        failure = self._failure(engine)
+        if failure:
+            return failure
+        return self._renderers[engine](request)
+
+    def _delay(self):
+        '''Returns a random latency from the configured distribution.'''
+        if not self.latency:
+            return 0.0
+        if not isinstance(self.latency, (tuple, list)):
+            return float(self.latency)
+        kind, a = self.latency[0], self.latency[1:]
+        with self._lock:
+            if kind == 'uniform':
+                return self._random.uniform(*a)
+            if kind == 'normal':
+                return max(0.0, self._random.gauss(*a))
+            if kind == 'lognormal':
+                return self._random.lognormvariate(*a)
+            if kind == 'exponential':
+                return self._random.expovariate(1.0 / a[0])
+        raise ValueError('Unknown latency distribution "{}"'.format(kind))
+
+    def _failure(self, engine):
+        '''Returns an injected error or captcha page, or None.'''
+        now = monotonic()
+        with self._lock:
+            count = self.requests[engine] = self.requests.get(engine, 0) + 1
+            recent = self._recent.setdefault(engine, deque())
+            while recent and now - recent[0] > 1.0:
+                recent.popleft()
+            recent.append(now)
+
+            status = None
+            if self.max_rate and len(recent) > self.max_rate:
+                status = 429
+            elif self.burst_every and (count - 1) % self.burst_every >= self.burst_every - self.burst_length:
+                status = self.burst_status
+            captcha = not status and self._random.random() < self.captcha_rate
+            if status or captcha:
+                self.failures[engine] = self.failures.get(engine, 0) + 1
+
+        if captcha:
+            return self._captcha(engine)
+        if status:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after else {}
+            if engine == 'qwant':
+                body = json.dumps({'status': 'error', 'data': {'error_code': 24}})
+                return MockResponse(status, body, 'application/json', headers)
+            body = _page.format(title='Error {}'.format(status), body='<h1>Too many requests</h1>')
+            return MockResponse(status, body, headers=headers)
+        return None
+
+    def _captcha(self, engine):
+        '''Returns the engine's captcha, or blocked, page.'''
+        if engine == 'qwant':
+            body = json.dumps({'status': 'error', 'data': {'error_code': 27, 'error_data': {'captchaUrl': '/captcha'}}})
+            return MockResponse(403, body, 'application/json')
+        form = (
+            u'<form id="blocked_feedback_form" method="post"></form>' if engine == 'startpage' else
+            u'<form id="captcha-form" action="/sorry/index" method="post"><div class="g-recaptcha"></div></form>'
+        )
+        body = _page.format(title='Captcha', body=u'<p>Please confirm that you are not a robot.</p>' + form)
+        return MockResponse(429 if engine == 'google' else 200, body)
+
+    def _items(self, query, page):
+        '''Returns the (link, title, text) of the results of a page, none after the last page.'''
+        if page < 1 or page > self.pages:
+            return []
+        slug = quote(query.lower().replace(' ', '-'), safe='')
+        items = []
+        for i in range(1, self.results + 1):
+            rank = (page - 1) * self.results + i
+            link = u'https://site{}.example.com/{}/{}'.format(rank, slug, rank)
+            title = u'{} - result {}'.format(query, rank)
+            text = u'Result {} of page {} for "{}", served by the mock server.'.format(rank, page, query)
+            items.append((escape(link), escape(title), escape(text)))
+        return items
+
+    @staticmethod
+    def _int(params, name, default):
+        '''Returns an integer parameter.'''
+        try:
+            return int(params.get(name, default))
+        except ValueError:
+            return default
+
+    def _html(self, title, body, status=200, headers=None):
+        '''Returns a HTML page.'''
+        return MockResponse(status, _page.format(title=escape(title), body=body), headers=headers or {})
+
+    def _home(self, form=u''):
+        '''Returns a home page.'''
+        return self._html('Search', form or u'<form action="/search"><input name="q"></form>')
+
+    def _google(self, request):
+        '''Google: cookies consent form, then Lynx markup with /url?q= links.'''
+        q = request.params.get('q', '')
+        if request.path == '/consent/save':
+            headers = {
+                'Set-Cookie': 'CONSENT=YES+; Path=/',
+                'Location': request.params.get('continue') or request.base + '/'
+            }
+            return self._html('Consent', u'', 302, headers)
+        if request.path != '/search':
+            return self._home()
+        if self.consent and 'CONSENT' not in request.cookies:
+            inputs = [('gl', 'GB'), ('continue', request.base + '/search?' + urlencode({'q': q})), ('set_sc', 'true'), ('set_aps', 'true')]
+            form = u'<form action="{}/consent/save" method="post">{}<input type="submit" value="Accept all"></form>'.format(
+                request.base, u''.join(u'<input type="hidden" name="{}" value="{}">'.format(k, escape(v)) for k, v in inputs)
+            )
+            return self._html('Before you continue', form)
+
+        start = self._int(request.params, 'start', 0)
+        page = start // self.results + 1
+        results = u''.join(
+            u'<div><div><a href="/url?q={}&amp;sa=U&amp;ved=0"><h3><div>{}</div></h3></a></div>'
+            u'<div><table><tr><td>{}</td></tr></table></div></div>'.format(quote(link, safe=':/'), title, text)
+            for link, title, text in self._items(q, page)
+        )
+        nav = u''
+        if page > 1:
+            nav += u'<td><a href="/search?q={}&amp;start={}">Previous</a></td>'.format(quote(q), start - self.results)
+        if page < self.pages:
+            nav += u'<td><a href="/search?q={}&amp;start={}" aria-label="Next page">Next</a></td>'.format(quote(q), start + self.results)
+        body = (
+            u'<div id="main">{}<footer><div><div><a href="/url?q=https://support.google.com/websearch&amp;sa=U">'
+            u'Learn more</a></div></div><table><tr>{}</tr></table></footer></div>'
+        ).format(results, nav)
+        return self._html(q + ' - Google Search', body)
+
+    def _bing(self, request):
+        '''Bing: home page, then b_algo results paginated by `first`.'''
+        q = request.params.get('q', '')
+        if request.path != '/search':
+            return self._home()
+        first = self._int(request.params, 'first', 1)
+        page = (first - 1) // self.results + 1
+        results = u''.join(
+            u'<li class="b_algo"><h2><a href="{}">{}</a></h2><div class="b_caption"><p>{}</p></div></li>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            nav = u'<a class="sb_pagN" href="/search?q={}&amp;first={}&amp;FORM=PERE" title="Next page">Next</a>'.format(
+                quote(q), first + self.results
+            )
+        return self._html(q + ' - Bing', u'<ol id="b_results">{}</ol>{}'.format(results, nav))
+
+    def _yahoo_page(self, request, param, path):
+        '''Yahoo and Aol results, with redirect links and `b` pagination.'''
+        q = request.params.get(param, '')
+        b = self._int(request.params, 'b', 1)
+        page = (b - 1) // self.results + 1
+        results = u''.join(
+            u'<li><div class="dd algo algo-sr"><div class="compTitle"><h3 class="title">'
+            u'<a href="https://r.search.yahoo.com/_ylt=A0/RV=2/RE=1/RO=10/RU={}/RK=2/RS=x-">'
+            u'<span>{}</span>{}</a></h3></div><div class="compText"><p>{}</p></div></div></li>'.format(
+                quote(link, safe=''), urlparse(link).netloc, title, text
+            )
+            for link, title, text in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            nav = u'<a class="next" href="{}?{}">Next</a>'.format(path, escape(urlencode({param: q, 'b': b + self.results})))
+        return self._html(q + ' - Search Results', u'<div id="web"><ol>{}</ol></div>{}'.format(results, nav))
+
+    def _yahoo(self, request):
+        '''Yahoo: search by `p`.'''
+        if request.path != '/search':
+            return self._home()
+        return self._yahoo_page(request, 'p', '/search')
+
+    def _aol(self, request):
+        '''Aol: home page, then search by `q`.'''
+        if request.path != '/aol/search':
+            return self._home()
+        return self._yahoo_page(request, 'q', '/aol/search')
+
+    def _duckduckgo(self, request):
+        '''Duckduckgo: html results, with a form POST for the next page.'''
+        q = request.params.get('q', '')
+        if not request.path.startswith('/html'):
+            return self._home()
+        offset = self._int(request.params, 's', 0)
+        page = offset // self.results + 1
+        results = u''.join(
+            u'<div class="result results_links results_links_deep web-result"><h2 class="result__title">'
+            u'<a class="result__a" href="{0}">{1}</a></h2><a class="result__snippet" href="{0}">{2}</a></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            inputs = [('q', q), ('s', offset + self.results), ('dc', offset + self.results + 1), ('kl', 'us-en')]
+            nav = u'<div class="nav-link"><form action="/html/" method="post"><input type="submit" value="Next">{}</form></div>'.format(
+                u''.join(u'<input type="hidden" name="{}" value="{}">'.format(k, escape(str(v))) for k, v in inputs)
+            )
+        return self._html(q + ' at DuckDuckGo', u'<div class="results">{}</div>{}'.format(results, nav))
+
+    def _startpage(self, request):
+        '''Startpage: home page search form, then form POST pagination.'''
+        if request.path != '/sp/search':
+            form = (
+                u'<form id="search" action="/sp/search" method="post"><input type="hidden" name="lui" value="english">'
+                u'<input type="hidden" name="sc" value="mock"><input type="hidden" name="cat" value="web">'
+                u'<input type="text" name="query" value=""></form>'
+            )
+            return self._home(form)
+        q = request.params.get('query', '')
+        page = self._int(request.params, 'page', 1)
+        results = u''.join(
+            u'<div class="w-gl__result"><a class="w-gl__result-title" href="{0}"><h3>{1}</h3></a>'
+            u'<a class="w-gl__result-url" href="{0}">{0}</a><p class="w-gl__description">{2}</p></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        form = (
+            u'<form class="pagination__form" action="/sp/search" method="post"><input type="hidden" name="query" value="{}">'
+            u'<input type="hidden" name="page" value="{}"><input type="hidden" name="sc" value="mock"><button type="submit">{}</button></form>'
+        )
+        nav = form.format(escape(q), page - 1, 'Previous') if page > 1 else u''
+        if page < self.pages:
+            nav += form.format(escape(q), page + 1, 'Next')
+        return self._html(q + ' - Startpage', u'<section class="w-gl">{}</section>{}'.format(results, nav))
+
+    def _dogpile(self, request):
+        '''Dogpile: web-bing results paginated by `page`.'''
+        q = request.params.get('q', '')
+        if request.path != '/serp':
+            return self._home()
+        page = self._int(request.params, 'page', 1)
+        results = u''.join(
+            u'<div class="web-bing__result"><a class="web-bing__title" href="{0}">{1}</a>'
+            u'<span class="web-bing__url">{0}</span><span class="web-bing__description">{2}</span></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            nav = u'<a class="pagination__num pagination__num--next" href="/serp?q={}&amp;page={}">Next</a>'.format(quote(q), page + 1)
+        return self._html(q + ' - Dogpile', u'<div class="web-bing__results">{}</div>{}'.format(results, nav))
+
+    def _ask(self, request):
+        '''Ask: PartialSearchResults markup paginated by `page`.'''
+        q = request.params.get('q', '')
+        if request.path != '/web':
+            return self._home()
+        page = self._int(request.params, 'page', 1)
+        results = u''.join(
+            u'<div class="PartialSearchResults-item"><div class="PartialSearchResults-item-title">'
+            u'<a class="PartialSearchResults-item-title-link result-link" href="{0}">{1}</a></div>'
+            u'<p class="PartialSearchResults-item-abstract">{2}</p></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            nav = u'<ul><li class="PartialWebPagination-next"><a href="/web?q={}&amp;page={}">Next</a></li></ul>'.format(quote(q), page + 1)
+        return self._html(q + ' - Ask', u'<div class="PartialSearchResults-body">{}</div>{}'.format(results, nav))
+
+    def _mojeek(self, request):
+        '''Mojeek: results-standard list paginated by `s`.'''
+        q = request.params.get('q', '')
+        if request.path != '/search':
+            return self._home()
+        s = self._int(request.params, 's', 1)
+        page = (s - 1) // self.results + 1
+        results = u''.join(
+            u'<li><h2><a class="ob" href="{0}">{1}</a></h2><p class="i">{0}</p><p class="s">{2}</p></li>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            nav = u'<div class="pagination"><ul><li><a href="/search?q={}&amp;s={}">Next</a></li></ul></div>'.format(quote(q), s + self.results)
+        return self._html(q + ' - Mojeek', u'<ul class="results-standard">{}</ul>{}'.format(results, nav))
+
+    def _brave(self, request):
+        '''Brave: main snippets paginated by `offset`, with a disabled Next link on the last page.'''
+        q = request.params.get('q', '')
+        if request.path != '/search':
+            return self._home()
+        offset = self._int(request.params, 'offset', 0)
+        results = u''.join(
+            u'<div class="snippet" data-loc="main"><a class="result-header" href="{0}">'
+            u'<span class="snippet-title">{1}</span></a><div class="snippet-content">{2}</div></div>'.format(*item)
+            for item in self._items(q, offset + 1)
+        )
+        if offset + 1 < self.pages:
+            nav = u'<a class="btn" href="/search?q={}&amp;source=web&amp;offset={}">Next</a>'.format(quote(q), offset + 1)
+        else:
+            nav = u'<a class="btn disabled" href="#">Next</a>'
+        return self._html(q + ' - Brave Search', u'<div id="results">{}</div><div id="pagination">{}</div>'.format(results, nav))
+
+    def _torch(self, request):
+        '''Torch: results paginated by `page`.'''
+        q = request.params.get('query', '')
+        if request.path != '/search':
+            return self._home()
+        page = self._int(request.params, 'page', 1)
+        results = u''.join(
+            u'<div class="result mb-3"><h5><a href="{0}">{1}</a></h5><p>{2}</p></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u'<ul class="pagination"><li><a class="page-link" href="/search?query={}&amp;page={}">{}</a></li></ul>'.format(
+            quote(q), page + 1, page + 1
+        )
+        return self._html(q + ' - Torch', results + nav)
+
+    def _qwant(self, request):
+        '''Qwant: the JSON API paginated by `offset`.'''
+        q = request.params.get('q', '')
+        count = self._int(request.params, 'count', self.results)
+        offset = self._int(request.params, 'offset', 0)
+        items = [
+            {'url': link, 'title': title, 'desc': text}
+            for link, title, text in self._items(q, offset // max(count, 1) + 1)
+        ]
+        ads = [{'url': 'https://ads.example.com/', 'title': 'Ad', 'desc': 'Ad'}]
+        data = {'status': 'success', 'data': {'result': {'items': {'mainline': [
+            {'type': 'ads', 'items': ads}, {'type': 'web', 'items': items}
+        ]}}}}
+        return MockResponse(200, json.dumps(data), 'application/json')
+
+    def _metager(self, request):
+        '''Metager: an iframe that redirects to the results page.'''
+        q = request.params.get('eingabe', '')
+        page = self._int(request.params, 'page', 1)
+        if request.path == '/meta/meta.ger3':
+            src = u'{}/meta/results?{}'.format(request.base, urlencode({'eingabe': q, 'page': page}))
+            return self._html('MetaGer', u'<iframe src="{}"></iframe>'.format(escape(src)))
+        if request.path != '/meta/results':
+            return self._home()
+        results = u''.join(
+            u'<div class="result"><h2 class="result-title"><a href="{0}">{1}</a></h2>'
+            u'<a class="result-link" href="{0}">{0}</a><div class="result-description">{2}</div></div>'.format(*item)
+            for item in self._items(q, page)
+        )
+        nav = u''
+        if page < self.pages:
+            href = u'{}/meta/meta.ger3?{}'.format(request.base, urlencode({'eingabe': q, 'page': page + 1}))
+            nav = u'<div id="next-search-link"><a href="{}">Next</a></div>'.format(escape(href))
+        return self._html(q + ' - MetaGer', u'<div id="results">{}</div>{}'.format(results, nav))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Routes requests to the engines by the first path segment.'''
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    mock = None
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+        self._respond(dict(parse_qsl(form, keep_blank_values=True)))
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, form=None):
+        url = urlparse(self.path)
+        engine, _, path = url.path.lstrip('/').partition('/')
+        engine = engine.lower()
+        if engine not in self.mock._renderers:
+            response = MockResponse(404, _page.format(title='Not found', body=u''))
+        else:
+            params = dict(parse_qsl(url.query, keep_blank_values=True), **(form or {}))
+            cookies = {k: v.value for k, v in SimpleCookie(self.headers.get('Cookie', '')).items()}
+            base = 'http://{}/{}'.format(self.headers.get('Host', '127.0.0.1'), engine)
+            request = MockRequest(self.command, '/' + path, params, cookies, base)
+            response = self.mock.handle(engine, request)
+
+        body = response.body.encode('utf-8')
+        self.send_response(response.status)
+        self.send_header('Content-Type', response.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in response.headers.items():
+            if name == 'Location' and value.startswith('/'):
+                value = 'http://{}{}'.format(self.headers.get('Host', '127.0.0.1'), value)
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _latency(value):
+    '''Parses "0.2" or "uniform:0.1:0.5" latency arguments.'''
+    parts = value.split(':')
+    if len(parts) == 1:
+        return float(parts[0])
+    return tuple([parts[0]] + [float(i) for i in parts[1:]])
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Local mock search engines server')
+    ap.add_argument('-host', help='interface (default: 127.0.0.1)', default='127.0.0.1')
+    ap.add_argument('-port', help='port (default: 8000)', default=8000, type=int)
+    ap.add_argument('-pages', help='results pages per query (default: 5)', default=5, type=int)
+    ap.add_argument('-results', help='results per page (default: 10)', default=10, type=int)
+    ap.add_argument('-latency', help='seconds, or distribution:a:b [uniform, normal, lognormal, exponential]', type=_latency)
+    ap.add_argument('-burst', help='fail the last 3 of every N requests per engine', default=0, type=int)
+    ap.add_argument('-status', help='HTTP status of failed requests (default: 429)', default=429, type=int)
+    ap.add_argument('-retry', help='Retry-After seconds of failed requests', type=float)
+    ap.add_argument('-rate', help='maximum requests per second per engine', type=float)
+    ap.add_argument('-captcha', help='probability of captcha pages (default: 0)', default=0.0, type=float)
+    ap.add_argument('-seed', help='random seed', type=int)
+    args = ap.parse_args()
+
+    server = MockSerpServer(
+        args.host, args.port, args.pages, args.results, args.latency, args.burst,
+        burst_status=args.status, retry_after=args.retry, max_rate=args.rate,
+        captcha_rate=args.captcha, seed=args.seed
+    )
+    print('Serving on {}/<engine>, engines: {}'.format(server.url, ', '.join(sorted(server._renderers))))
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from .results import SearchResults
+from .metrics import Metrics
+from .http_client import latency_summary
 from .engines import search_engines_dict
+from .events import EventBus
 from . import output as out
+from . import events
 from . import config as cfg
 
 
@@ -16,38 +23,138 @@ class MultipleSearchEngines(object):
 
         self.ignore_duplicate_urls = False
         self.ignore_duplicate_domains = False
+        self.parser = cfg.PARSER
+        self.workers = cfg.SEARCH_ENGINE_WORKERS
+        '''The maximum number of engines that search concurrently.'''
         self.results = SearchResults()
         self.banned_engines = []
+        self.metrics = Metrics('multiple')
+        '''The timings of the engines fan-out and the results merge.'''
+        self.events = EventBus([events.console], parent=events.bus)
+        '''The messages of the reports; the engines emit their own search events.'''
     
     def disable_console(self):
-        '''Disables console output'''
-        out.console = lambda msg, end='\n', level=None: None
+        '''Disables the console output of all engines.'''
+        self.events.unsubscribe(events.console)
+        for engine in self._engines:
+            engine.disable_console()
     
     def set_search_operator(self, operator):
         '''Filters search results based on the operator.'''
         self._filter = operator
     
-    def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
-        '''Searches multiples engines and collects the results.'''
+    def set_cassette(self, cassette):
+        '''Records or replays the HTTP requests of all engines with a cassette.'''
+        for engine in self._engines:
+            engine.set_cassette(cassette)
+    
+    def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, output=None, path=None): 
+        '''Searches multiples engines and collects the results.
+        Engines run concurrently if `workers` > 1, the results are merged in engine order.
+        The `output` report formats are written as pages arrive, in engine order, 
+        with the same duplicates removed as the merged results.
+        '''
+        self._setup_engines()
+        report = out.Report(
+            output, path or self._output_path(query), query, 
+            [engine.__class__.__name__ for engine in self._engines], 
+            self.ignore_duplicate_urls, self.ignore_duplicate_domains, self.events.message
+        )
+        def search(engine):
+            try:
+                engine._search(query, pages, report)
+            finally:
+                report.finish(engine)
+            return engine.results
+        
+        with report, self.metrics.timer('engines'):
+            if self.workers > 1 and len(self._engines) > 1:
+                all_results = self._search_concurrently(search, report)
+            else:
+                all_results = [search(engine) for engine in self._engines]
+        with self.metrics.timer('merge'):
+            return self._merge_results(all_results)
+    
+    async def asearch(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES): 
+        '''Searches multiples engines concurrently in the running event loop.
+        The results are merged in engine order. An engine that fails keeps 
+        the results it found, the other engines' searches go on.
+        '''
+        async def search(engine):
+            try:
+                return await engine.asearch(query, pages)
+            except Exception as e:
+                msg = u'{} "{}": {}'.format(engine.__class__.__name__, query, e)
+                engine.events.emit(events.ERROR, message=msg)
+                return engine.results
+
+        self._setup_engines()
+        with self.metrics.timer('engines'):
+            all_results = await asyncio.gather(*[search(engine) for engine in self._engines])
+        with self.metrics.timer('merge'):
+            return self._merge_results(all_results)
+    
+    def _search_concurrently(self, search, report):
+        '''Runs the engines' searches in the worker pool. On Ctrl-C the searches 
+        that haven't started are cancelled, and the report is closed, so the running 
+        ones stop after their current page. Once they have stopped, the results 
+        found so far are returned.'''
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        futures = [executor.submit(search, engine) for engine in self._engines]
+        try:
+            return [future.result() for future in futures]
+        except KeyboardInterrupt:
+            self.events.message('Interrupted, waiting for the running pages', 'warning')
+            executor.shutdown(wait=False, cancel_futures=True)
+            report.close()
+            wait(futures)
+            return [engine.results for engine in self._engines]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def latency_stats(self, by='engine'):
+        '''Returns the p50, p95 and p99 of the request phases of all engines.
+        
+        :param by: str Optional, 'engine' or a RequestInfo field to group by, e.g. 'proxy' 
+        '''
+        if by != 'engine':
+            return latency_summary([i for e in self._engines for i in e.requests_info()], by)
+        return {
+            engine.__class__.__name__.lower(): engine.latency_stats()['all'] 
+            for engine in self._engines if engine.requests_info()
+        }
+    
+    def all_metrics(self):
+        '''Returns the metrics of the engines fan-out and of every engine.'''
+        return [self.metrics] + [engine.metrics for engine in self._engines]
+    
+    def _setup_engines(self):
+        '''Applies the search settings to all engines.'''
         self.results = SearchResults()
         for engine in self._engines:
+            engine.results = SearchResults()
             engine.ignore_duplicate_urls = self.ignore_duplicate_urls
             engine.ignore_duplicate_domains = self.ignore_duplicate_domains
+            engine.parser = self.parser
             if self._filter:
                 engine.set_search_operator(self._filter)
-            
-            engine_results = engine.search(query, pages)
+    
+    def _merge_results(self, all_results):
+        '''Collects the engines results, removing duplicates across engines.'''
+        for engine, engine_results in zip(self._engines, all_results):
+            items = engine_results.results()
             if engine.ignore_duplicate_urls:
-                engine_results._results = [
-                    item for item in engine_results._results 
-                    if item['link'] not in self.results.links()
+                items = [
+                    item for item in items 
+                    if not self.results.has_link(item['link'])
                 ]
             if self.ignore_duplicate_domains:
-                engine_results._results = [
-                    item for item in engine_results._results 
-                    if item['host'] not in self.results.hosts()
+                items = [
+                    item for item in items 
+                    if not self.results.has_host(item['host'])
                 ]
-            self.results._results += engine_results._results
+            engine.results = SearchResults(items)
+            self.results.extend(items)
 
             if engine.is_banned:
                 self.banned_engines.append(engine.__class__.__name__)
@@ -55,20 +162,21 @@ class MultipleSearchEngines(object):
     
     def output(self, output=out.PRINT, path=None):
         '''Prints search results and/or creates report files.'''
-        output = (output or '').lower()
         query = self._engines[0]._query if self._engines else u''
-        if not path:
-            path = cfg.OUTPUT_DIR + u'_'.join(query.split())
-        out.console('')
+        path = path or self._output_path(query)
+        self.events.message(u'')
 
-        if out.PRINT in output:
+        if out.PRINT in out.output_formats(output):
             out.print_results(self._engines)
-        if out.HTML in output:
-            out.write_file(out.create_html_data(self._engines), path + u'.html') 
-        if out.CSV in output:
-            out.write_file(out.create_csv_data(self._engines), path + u'.csv') 
-        if out.JSON in output:
-            out.write_file(out.create_json_data(self._engines), path + u'.json')
+        names = [engine.__class__.__name__ for engine in self._engines]
+        with out.Report(output, path, query, names, messages=self.events.message) as report:
+            for engine in self._engines:
+                report.write(engine, engine.results)
+        out.flush_console()
+    
+    def _output_path(self, query):
+        '''Returns the default path of the report files.'''
+        return cfg.OUTPUT_DIR + u'_'.join((query or u'').split())
 
 
 class AllSearchEngines(MultipleSearchEngines):
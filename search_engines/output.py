@@ -4,13 +4,13 @@ import csv
 import json
 import io
 import re
-from collections import namedtuple
+import shutil
+from threading import Lock
+from tempfile import SpooledTemporaryFile
+from collections import namedtuple, OrderedDict
 
-try:
-    from shutil import get_terminal_size
-except ImportError:
-    from .libs.get_terminal_size import get_terminal_size
-    
+from .console import console as _console
+from .results import results_table
 from .utils import encode_str, decode_bytes
 from .libs import windows_cmd_encoding
 from .config import PYTHON_VERSION
@@ -19,11 +19,9 @@ from .config import PYTHON_VERSION
 def print_results(search_engines):
     '''Prints the search results.'''
     for engine in search_engines:
-        console(engine.__class__.__name__ + u' results') 
-
-        for i, v in enumerate(engine.results, 1):
-            console(u'{:<4}{}'.format(i, v['link'])) 
-        console(u'')
+        lines = [engine.__class__.__name__ + u' results']
+        lines += [u'{:<4}{}'.format(i, v['link']) for i, v in enumerate(engine.results, 1)]
+        console(u'\n'.join(lines) + u'\n')
 
 def create_csv_data(search_engines):
     '''CSV formats the search results.'''
@@ -42,40 +40,401 @@ def create_csv_data(search_engines):
 
 def create_json_data(search_engines):
     '''JSON formats the search results.'''
-    jobj = {
-        u'query': search_engines[0]._query, 
-        u'results': {
-            se.__class__.__name__: [i for i in se.results] 
-            for se in search_engines
-        }
-    }
-    return json.dumps(jobj)
+    return _create_data(JsonWriter, search_engines)
 
 def create_html_data(search_engines):
     '''HTML formats the search results.'''
-    query = decode_bytes(search_engines[0]._query) if search_engines else u''
-    tables = u''
+    return _create_data(HtmlWriter, search_engines)
 
+def _create_data(writer_class, search_engines):
+    '''Returns the report of a writer class as a string.'''
+    query = search_engines[0]._query if search_engines else u''
+    f = io.StringIO()
+    writer = writer_class(f, query)
+    writer.open([se.__class__.__name__ for se in search_engines])
     for engine in search_engines:
-        rows = u''
-        for i, v in enumerate(engine.results, 1):
-            data = u''
-            if u'title' in engine._filters:
-                data += HtmlTemplate.data.format(_replace_with_bold(query, v['title']))
-            if u'text' in engine._filters:
-                data += HtmlTemplate.data.format(_replace_with_bold(query, v['text']))
-            link = _replace_with_bold(query, v['link']) if u'url' in engine._filters else v['link']
-            rows += HtmlTemplate.row.format(number=i, href=v['link'], link=link, data=data)
+        writer.write_batch(engine, engine.results)
+    writer.close()
+    return f.getvalue()
+
+class Highlighter(object):
+    '''Places the query terms in <b> tags. The terms are matched literally and 
+    case-insensitively, with one compiled pattern, in a single pass over the text.
+    Quoted phrases are matched whole, search operators (site:, inurl: ...) and 
+    wildcard labels (*.) are stripped from their terms, and excluded (-term) terms 
+    and bare * wildcards are not highlighted.'''
+    operators = (
+        u'site', u'inurl', u'intitle', u'intext', u'inanchor', u'allinurl', u'allintitle', 
+        u'allintext', u'filetype', u'ext', u'related', u'cache', u'info', u'link', u'define'
+    )
+    _tokens = re.compile(u'(-)?(?:(\\w+):)?(?:"([^"]*)"?|(\\S+))', re.U)
+
+    def __init__(self, query):
+        terms = {t.lower(): t for t in self.terms(query)}.values()
+        terms = sorted(terms, key=len, reverse=True)
+        self._regex = re.compile(u'|'.join(re.escape(t) for t in terms), re.I) if terms else None
+
+    def __call__(self, data):
+        if self._regex is None:
+            return data
+        return self._regex.sub(_bold, data)
+
+    @classmethod
+    def terms(cls, query):
+        '''Returns the terms of a query that appear in the results.'''
+        terms = []
+        for excluded, operator, phrase, word in cls._tokens.findall(decode_bytes(query or u'')):
+            if operator and operator.lower() not in cls.operators:
+                word = operator + u':' + word
+            term = (phrase or word.replace(u'"', u'').lstrip(u'+~')).strip()
+            term = re.sub(u'^(\\*\\.)+', u'', term)
+            if excluded or term in (u'OR', u'AND') or not re.search(u'\\w', term, re.U):
+                continue
+            terms.append(term)
+        return terms
+
+def _bold(match):
+    '''Returns a match in <b> tags.'''
+    return u'<b>' + match.group() + u'</b>'
+
+
+class ResultsWriter(object):
+    '''Writes search results to a report file as they arrive: open(), 
+    write_batch() for each page, then close(), which completes the document.'''
+    extension = None
+
+    def __init__(self, path, query=u'', encoding='utf-8'):
+        '''
+        :param path: the file path, or a text file object
+        :param str query: optional, the search query
+        :param str encoding: optional, the file encoding
+        '''
+        self.path = path
+        self.query = decode_bytes(query or u'')
+        self.encoding = encoding
+        self._file = None
+
+    def open(self, engines=()):
+        '''Opens the file and writes the document header.
         
-        engine_name = engine.__class__.__name__
-        tables += HtmlTemplate.table.format(engine=engine_name, rows=rows)
-    return HtmlTemplate.html.format(query=query, table=tables)
-
-def _replace_with_bold(query, data):
-    '''Places the query in <b> tags.'''
-    for match in re.findall(query, data, re.I):
-        data = data.replace(match, u'<b>{}</b>'.format(match))
-    return data
+        :param engines: optional, the names of the engines, in report order
+        '''
+        if hasattr(self.path, 'write'):
+            self._file = self.path
+        else:
+            self._file = io.open(self.path, 'w', encoding=self.encoding, newline='')
+        self._open(engines)
+        return self
+
+    def write_batch(self, engine, results):
+        '''Writes the results of an engine.'''
+        raise NotImplementedError()
+
+    def close(self):
+        '''Completes the document and closes the file.'''
+        if self._file is None:
+            return
+        try:
+            self._close()
+        finally:
+            if self._file is not self.path:
+                self._file.close()
+            self._file = None
+
+    def _open(self, engines):
+        '''Writes the document header.'''
+        pass
+
+    def _close(self):
+        '''Writes the document footer.'''
+        pass
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CsvWriter(ResultsWriter):
+    '''Writes a CSV report, one row per result.'''
+    extension = u'csv'
+
+    def _open(self, engines):
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['query', 'engine', 'domain', 'URL', 'title', 'text'])
+
+    def write_batch(self, engine, results):
+        name = engine.__class__.__name__
+        self._writer.writerows(
+            [self.query, name, i['host'], i['link'], i['title'], i['text']] for i in results
+        )
+        self._file.flush()
+
+
+class JsonlWriter(ResultsWriter):
+    '''Writes a JSON lines report, one object per result.'''
+    extension = u'jsonl'
+
+    def write_batch(self, engine, results):
+        name = engine.__class__.__name__
+        for i in results:
+            item = dict(i, engine=name, query=self.query)
+            self._file.write(json.dumps(item) + u'\n')
+        self._file.flush()
+
+
+class ParquetWriter(ResultsWriter):
+    '''Writes a Parquet report with the columns of results_table(). Results are 
+    buffered and written in row groups of ROW_GROUP_SIZE rows. Requires `pyarrow`, 
+    which is imported by open().'''
+    extension = u'parquet'
+    ROW_GROUP_SIZE = 10000
+    _items = None
+
+    def open(self, engines=()):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('ParquetWriter requires `pyarrow`, please install it.')
+        self._parquet = pyarrow.parquet
+        self._writer = None
+        self._items = []
+        self._engines = []
+        return self
+
+    def write_batch(self, engine, results):
+        self._items.extend(results)
+        self._engines.extend([engine.__class__.__name__] * len(results))
+        if len(self._items) >= self.ROW_GROUP_SIZE:
+            self._write_row_group()
+
+    def close(self):
+        if self._items is None:
+            return
+        try:
+            if self._items or self._writer is None:
+                self._write_row_group()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = self._items = self._engines = None
+
+    def _write_row_group(self):
+        '''Writes the buffered results as a row group.'''
+        table = results_table(self._items, self._engines, self.query)
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table, row_group_size=max(len(table), 1))
+        self._items = []
+        self._engines = []
+
+
+class _SectionsWriter(ResultsWriter):
+    '''Writes a report that groups the results by engine. The first engine's 
+    results go straight to the file, the others are spooled (to disk past 
+    SPOOL_SIZE) and appended by close().'''
+    SPOOL_SIZE = 1024 * 1024
+
+    def _open(self, engines):
+        self._sections = OrderedDict()
+        self._head()
+        for name in engines:
+            self._section(name)
+
+    def write_batch(self, engine, results):
+        section = self._section(engine.__class__.__name__)
+        for i in results:
+            section[1] += 1
+            section[0].write(self._item(engine, section[1], i))
+        self._file.flush()
+
+    def _close(self):
+        for index, (name, (f, count)) in enumerate(self._sections.items()):
+            if f is not self._file:
+                self._file.write(self._section_head(name, index))
+                f.seek(0)
+                shutil.copyfileobj(f, self._file)
+                f.close()
+            self._file.write(self._section_tail(name, count))
+        self._tail()
+
+    def _section(self, name):
+        '''Returns the [file, results count] of an engine.'''
+        if name not in self._sections:
+            if self._sections:
+                f = SpooledTemporaryFile(self.SPOOL_SIZE, 'w+', encoding=self.encoding)
+            else:
+                f = self._file
+                f.write(self._section_head(name, 0))
+            self._sections[name] = [f, 0]
+        return self._sections[name]
+
+
+class JsonWriter(_SectionsWriter):
+    '''Writes a JSON report: the query, and the results per engine.'''
+    extension = u'json'
+
+    def _head(self):
+        self._file.write(u'{{"query": {}, "results": {{'.format(json.dumps(self.query)))
+
+    def _section_head(self, name, index):
+        return u'{}{}: ['.format(u', ' if index else u'', json.dumps(name))
+
+    def _item(self, engine, number, item):
+        return (u', ' if number > 1 else u'') + json.dumps(dict(item))
+
+    def _section_tail(self, name, count):
+        return u']'
+
+    def _tail(self):
+        self._file.write(u'}}')
+
+
+class HtmlWriter(_SectionsWriter):
+    '''Writes a HTML report, a table per engine.'''
+    extension = u'html'
+
+    def _head(self):
+        self._highlight = Highlighter(self.query)
+        self._file.write(HtmlTemplate.html.split(u'{table}')[0].format(query=self.query))
+
+    def _section_head(self, name, index):
+        return HtmlTemplate.table.split(u'{rows}')[0].format(engine=name)
+
+    def _item(self, engine, number, item):
+        data = u''
+        if u'title' in engine._filters:
+            data += HtmlTemplate.data.format(self._highlight(item['title']))
+        if u'text' in engine._filters:
+            data += HtmlTemplate.data.format(self._highlight(item['text']))
+        link = self._highlight(item['link']) if u'url' in engine._filters else item['link']
+        return HtmlTemplate.row.format(number=number, href=item['link'], link=link, data=data)
+
+    def _section_tail(self, name, count):
+        return HtmlTemplate.table.split(u'{rows}')[1]
+
+    def _tail(self):
+        self._file.write(HtmlTemplate.html.split(u'{table}')[1])
+
+
+class Report(object):
+    '''Writes the results of one or more engines to report files, as pages arrive. 
+    Engines are written in report order: the results of an engine are buffered 
+    until the engines before it are finished. Duplicates are skipped like 
+    MultipleSearchEngines merges the results, against the earlier engines.
+    Thread safe; results that arrive after close() are ignored.'''
+    def __init__(self, output, path, query=u'', engines=(), ignore_urls=False, ignore_hosts=False, messages=None):
+        '''
+        :param output: the report formats, e.g. 'csv' or 'html,json'
+        :param str path: the report files path, without extension
+        :param str query: optional, the search query
+        :param engines: optional, the names of the engines, in report order
+        :param bool ignore_urls: optional, skips the links of earlier engines
+        :param bool ignore_hosts: optional, skips the hosts of earlier engines
+        :param messages: optional, a callable that receives (message, level) of the 
+        output files and errors, e.g. EventBus.message; they're printed by default
+        '''
+        self.writers = [
+            WRITERS[f](u'{}.{}'.format(path, f), query) 
+            for f in output_formats(output) if f in WRITERS
+        ]
+        self.engines = list(engines)
+        self.ignore_urls = ignore_urls
+        self.ignore_hosts = ignore_hosts
+        self._message = messages or _console_message
+        self._waiting = list(self.engines)
+        self._finished = set()
+        self._buffers = {}
+        self._links = set()
+        self._hosts = set()
+        self._written = (set(), set())
+        self._lock = Lock()
+        self._closed = True
+
+    @property
+    def closed(self):
+        '''Indicates if the report is closed, searches that write to it may stop.'''
+        return self._closed
+
+    def open(self):
+        '''Opens the report files.'''
+        with self._lock:
+            for writer in list(self.writers):
+                try:
+                    writer.open(self.engines)
+                except IOError as e:
+                    self._message(u'{}'.format(e), 'error')
+                    self.writers.remove(writer)
+            self._closed = False
+        return self
+
+    def write(self, engine, results):
+        '''Writes new results of an engine, or buffers them until its turn.'''
+        name = engine.__class__.__name__
+        with self._lock:
+            if self._closed:
+                return
+            if name in self._waiting[1:]:
+                self._buffers.setdefault(name, []).append((engine, list(results)))
+            else:
+                self._write(engine, results)
+
+    def finish(self, engine):
+        '''Marks an engine as finished, and writes the buffered results of the next ones.'''
+        with self._lock:
+            self._finished.add(engine.__class__.__name__)
+            while self._waiting and self._waiting[0] in self._finished:
+                self._next_engine()
+
+    def close(self):
+        '''Writes the buffered results, then completes and closes the report files.'''
+        with self._lock:
+            if self._closed:
+                return
+            while self._waiting:
+                self._next_engine()
+            self._closed = True
+            for writer in self.writers:
+                try:
+                    writer.close()
+                except IOError as e:
+                    self._message(u'{}'.format(e), 'error')
+                else:
+                    if not hasattr(writer.path, 'write'):
+                        self._message(u'Output file: ' + writer.path, None)
+
+    def _write(self, engine, results):
+        '''Writes results, without the duplicates of earlier engines.'''
+        if self.ignore_urls:
+            results = [i for i in results if i['link'] not in self._links]
+        if self.ignore_hosts:
+            results = [i for i in results if i['host'] not in self._hosts]
+        self._written[0].update(i['link'] for i in results)
+        self._written[1].update(i['host'] for i in results)
+        for writer in self.writers:
+            writer.write_batch(engine, results)
+
+    def _next_engine(self):
+        '''Moves on to the next engine in report order, and writes its buffered results.'''
+        self._waiting.pop(0)
+        self._links.update(self._written[0])
+        self._hosts.update(self._written[1])
+        self._written = (set(), set())
+        if self._waiting:
+            for engine, results in self._buffers.pop(self._waiting[0], []):
+                self._write(engine, results)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def output_formats(output):
+    '''Returns the output formats of an output string, e.g. 'html,json'.'''
+    return [f for f in re.split(r'[\s,;+]+', (output or u'').lower()) if f]
 
 
 def write_file(data, path, encoding='utf-8'):
@@ -98,11 +457,28 @@ def write_file(data, path, encoding='utf-8'):
 
 
 def console(msg, end='\n', level=None):
-    '''Prints data on the console.'''
-    console_len = get_terminal_size().columns
-    clear_line = u'\r{}\r'.format(u' ' * (console_len - 1))
-    msg = clear_line + (level or u'') + msg
-    print(msg, end=end)
+    '''Prints data on the console. Messages that don't end the line are 
+    transient, the next one replaces them.'''
+    msg = u'{}{}'.format(level or u'', msg)
+    if end == '\n':
+        _console.write(msg)
+    else:
+        progress(None, msg or None)
+
+def _console_message(message, level=None):
+    '''Prints a report message on the console.'''
+    console(message, level=getattr(Level, level) if level else None)
+
+def progress(key, msg=None, label=None):
+    '''Shows the progress of a task on the console's status line, None removes it.'''
+    if msg is None:
+        _console.done(key)
+    else:
+        _console.progress(key, msg, label)
+
+def flush_console():
+    '''Waits until the console messages are printed.'''
+    _console.flush()
 
 Level = namedtuple('Level', ['info', 'warning', 'error'])(
     info = u'INFO ',
@@ -113,7 +489,12 @@ Level = namedtuple('Level', ['info', 'warning', 'error'])(
 PRINT = 'print'
 HTML = 'html'
 JSON = 'json'
+JSONL = 'jsonl'
 CSV = 'csv'
+PARQUET = 'parquet'
+
+WRITERS = {CSV: CsvWriter, JSONL: JsonlWriter, JSON: JsonWriter, HTML: HtmlWriter, PARQUET: ParquetWriter}
+'''The report writer of each file format.'''
 
 
 class HtmlTemplate:
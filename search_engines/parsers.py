@@ -0,0 +1,82 @@
+from json import loads
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+from .config import PARSER
+
+
+## The pure-Python parser that ships with the standard library
+HTML_PARSER = 'html.parser'
+
+_response = namedtuple('response', ['http', 'html'])
+
+
+def resolve_parser(parser=PARSER):
+    '''Returns the parser name if it's installed, otherwise html.parser.'''
+    if parser and builder_registry.lookup(parser) is not None:
+        return parser
+    return HTML_PARSER
+
+def make_soup(html, parser=PARSER):
+    '''Parses HTML with the requested parser backend.'''
+    return BeautifulSoup(html, resolve_parser(parser))
+
+def compare_parsers(engine, pages, parsers=(HTML_PARSER, 'lxml')):
+    '''Checks that all parser backends extract the same results.
+
+    :param engine: SearchEngine The engine that processes the pages
+    :param pages: list The saved HTML pages
+    :param parsers: tuple The parser backends to compare
+    :returns list of (page index, parser) tuples whose results differ
+    '''
+    mismatches = []
+    for index, html in enumerate(pages):
+        expected = None
+        for parser in parsers:
+            results = engine._filter_results(ParsedPage(_response(200, html), parser))
+            if expected is None:
+                expected = results
+            elif results != expected:
+                mismatches.append((index, resolve_parser(parser)))
+    return mismatches
+
+
+class ParsedPage(object):
+    '''A HTTP response that's parsed or decoded only once, on first use.'''
+    def __init__(self, response, parser=PARSER):
+        '''
+        :param response: namedtuple The HttpClient response
+        :param str parser: optional, the HTML parser backend
+        '''
+        self.http = response.http
+        self.html = response.html
+        self.headers = getattr(response, 'headers', None)
+        self.transfer = getattr(response, 'transfer', None)
+        self.info = getattr(response, 'info', None)
+        self.cache_key = getattr(response, 'cache_key', None)
+        self._parser = parser
+        self._soup = None
+        self._json = None
+    
+    @property
+    def soup(self):
+        '''The parsed HTML document.'''
+        if self._soup is None:
+            self._soup = make_soup(self.html, self._parser)
+        return self._soup
+    
+    @property
+    def json(self):
+        '''The decoded JSON document.'''
+        if self._json is None:
+            self._json = loads(self.html)
+        return self._json
+    
+    def parse(self):
+        '''Parses the body now, as JSON if it's a JSON response, otherwise as HTML.'''
+        content_type = (self.headers or {}).get('Content-Type', '')
+        if 'json' in content_type or (self.html or '').lstrip()[:1] in ('{', '['):
+            return self.json
+        return self.soup
@@ -0,0 +1,129 @@
+import asyncio
+from threading import Lock
+from time import sleep, monotonic, time
+from random import uniform as random_uniform
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from . import config as cfg
+from . import utils
+
+
+class TokenBucket(object):
+    '''Paces the requests to a host. Thread safe, shared by all engines and queries.
+    The rate adapts to ban signals: additive increase, multiplicative decrease.'''
+    def __init__(self, rate, burst=1, jitter=0.0, min_rate=None, max_rate=None, clock=monotonic):
+        '''
+        :param float rate: the number of requests per second
+        :param int burst: optional, the number of requests that may be sent at once
+        :param float jitter: optional, the maximum random delay added to each request
+        :param float min_rate: optional, the lowest rate after bans
+        :param float max_rate: optional, the highest rate after successes
+        :param clock: optional, a callable that returns the current time in seconds
+        '''
+        self.rate = float(rate)
+        self.burst = burst
+        self.jitter = jitter
+        self.min_rate = min_rate or self.rate * cfg.ADAPTIVE_PACING['min_ratio']
+        self.max_rate = max_rate or self.rate
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._successes = 0
+        self._outcomes = deque(maxlen=cfg.ADAPTIVE_PACING['window'])
+        self._lock = Lock()
+
+    def reserve(self):
+        '''Takes a token and returns the seconds to wait before using it.'''
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return wait + random_uniform(0, self.jitter)
+
+    def success(self):
+        '''Raises the rate by a step after a number of consecutive successful requests.'''
+        with self._lock:
+            self._outcomes.append(False)
+            self._successes += 1
+            if self._successes >= cfg.ADAPTIVE_PACING['recovery']:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + cfg.ADAPTIVE_PACING['increase'])
+                self._successes = 0
+
+    def ban(self, retry_after=None):
+        '''Cuts the rate after a ban, and holds all requests for `retry_after` seconds.'''
+        with self._lock:
+            self._outcomes.append(True)
+            self._successes = 0
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * cfg.ADAPTIVE_PACING['decrease'])
+            if retry_after:
+                self._tokens = min(self._tokens, 1 - retry_after * self.rate)
+
+    def stats(self):
+        '''Returns the current rate and the ratio of bans in recent requests.'''
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            'rate': self.rate, 
+            'ban_ratio': (sum(outcomes) / float(len(outcomes))) if outcomes else 0.0, 
+            'requests': len(outcomes)
+        }
+
+    def acquire(self):
+        '''Blocks until a request may be sent.'''
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    async def aacquire(self):
+        '''Waits, without blocking the event loop, until a request may be sent.'''
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _refill(self):
+        '''Adds the tokens earned since the last update.'''
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+_limiters = {}
+_limiters_lock = Lock()
+
+
+def get_limiter(url):
+    '''Returns the process-wide rate limiter of the URL's host.'''
+    host = utils.host(url)
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limits = cfg.RATE_LIMITS.get(host, cfg.RATE_LIMIT)
+            limiter = _limiters[host] = TokenBucket(**limits)
+    return limiter
+
+def reset_limiters():
+    '''Discards all rate limiters, e.g. after changing config.RATE_LIMITS.'''
+    with _limiters_lock:
+        _limiters.clear()
+
+def parse_retry_after(headers, now=None):
+    '''Returns the seconds of the Retry-After header, or None.
+    
+    :param headers: the response headers
+    :param float now: optional, the current unix time, HTTP dates are relative to it
+    '''
+    value = (headers or {}).get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - (time() if now is None else now))
+        except (TypeError, ValueError):
+            return None
@@ -1,41 +1,174 @@
+from sys import intern
+from collections.abc import Mapping
+
+
+class Result(Mapping):
+    '''A compact search results item with a read-only dict interface'''
+    __slots__ = ('host', 'link', 'title', 'text')
+
+    def __init__(self, host=u'', link=u'', title=u'', text=u''):
+        self.host = intern(host)
+        self.link = link
+        self.title = title
+        self.text = text
+
+    @classmethod
+    def from_item(cls, item):
+        '''Returns a Result from a dictionary or Result item.'''
+        if isinstance(item, cls):
+            return item
+        return cls(*[item.get(key, u'') for key in cls.__slots__])
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, Result):
+            return self._fields() == other._fields()
+        return Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def _fields(self):
+        '''Returns the item values as a tuple.'''
+        return (self.host, self.link, self.title, self.text)
+
+
 class SearchResults(object):
     '''Stores the search results'''
     def __init__(self, items=None):
-        self._results = items or []
-    
+        self._results = []
+        self._items = set()
+        self._links = set()
+        self._hosts = set()
+        self.extend(items or [])
+
     def links(self):
         '''Returns the links found in search results'''
-        return [row.get('link') for row in self._results]
-    
+        return [row.link for row in self._results]
+
     def titles(self):
         '''Returns the titles found in search results'''
-        return [row.get('title') for row in self._results]
-    
+        return [row.title for row in self._results]
+
     def text(self):
         '''Returns the text found in search results'''
-        return [row.get('text') for row in self._results]
-    
+        return [row.text for row in self._results]
+
     def hosts(self):
         '''Returns the domains found in search results'''
-        return [row.get('host') for row in self._results]
-    
+        return [row.host for row in self._results]
+
     def results(self):
         '''Returns all data found in search results'''
         return self._results
-    
+
+    def has_link(self, link):
+        '''Checks if the link is in search results'''
+        return link in self._links
+
+    def has_host(self, host):
+        '''Checks if the domain is in search results'''
+        return host in self._hosts
+
+    def __contains__(self, item):
+        return Result.from_item(item) in self._items
+
     def __getitem__(self, index):
         return self._results[index]
-    
+
     def __len__(self):
         return len(self._results)
 
     def __str__(self):
         return '<SearchResults ({} items)>'.format(len(self._results))
-    
+
     def append(self, item):
         '''appends an item to the results list.'''
+        item = Result.from_item(item)
         self._results.append(item)
-    
+        self._items.add(item)
+        self._links.add(item.link)
+        self._hosts.add(item.host)
+
     def extend(self, items):
         '''appends items to the results list.'''
-        self._results.extend(items)
+        for item in items:
+            self.append(item)
+
+    def to_arrow(self, engine=None, query=None):
+        '''Returns the results as a pyarrow Table, see results_table().'''
+        return results_table(self._results, engine, query)
+
+    def to_frame(self, engine=None, query=None):
+        '''Returns the results as a pandas DataFrame; host, engine and query are categoricals.'''
+        if _pyarrow() is not None:
+            return self.to_arrow(engine, query).to_pandas()
+        import pandas as pd
+        columns = {}
+        for name, values in (('query', query), ('engine', engine)):
+            if values is not None:
+                columns[name] = pd.Categorical([values] * len(self) if isinstance(values, str) else values)
+        columns['host'] = pd.Categorical(self.hosts())
+        columns.update(link=self.links(), title=self.titles(), text=self.text())
+        return pd.DataFrame(columns)
+
+
+def results_table(items, engine=None, query=None):
+    '''Returns result items as a pyarrow Table with the columns: query, engine 
+    (when given), host, link, title and text. Engine and query are a name for 
+    all the items or a name per item. The host, engine and query columns are 
+    dictionary encoded.'''
+    pa = _pyarrow()
+    if pa is None:
+        raise ImportError('results_table requires `pyarrow`, please install it.')
+    items = items if isinstance(items, list) else list(items)
+    names, columns = [], []
+    for name, values in (('query', query), ('engine', engine)):
+        if values is not None:
+            names.append(name)
+            columns.append(_dictionary_array(pa, values, len(items)))
+    names += ['host', 'link', 'title', 'text']
+    columns += [
+        _dictionary_array(pa, [i['host'] for i in items]),
+        pa.array([i['link'] for i in items], pa.string()),
+        pa.array([i['title'] for i in items], pa.string()),
+        pa.array([i['text'] for i in items], pa.string())
+    ]
+    return pa.Table.from_arrays(columns, names)
+
+def _dictionary_array(pa, values, size=None):
+    '''Returns a dictionary encoded string array; a single string is repeated `size` times.'''
+    if isinstance(values, str):
+        indices, dictionary = [0] * size, [values]
+    else:
+        codes = {}
+        indices = [codes.setdefault(v, len(codes)) for v in values]
+        dictionary = list(codes)
+    return pa.DictionaryArray.from_arrays(
+        pa.array(indices, pa.int32()), pa.array(dictionary, pa.string())
+    )
+
+def _pyarrow():
+    '''Returns the pyarrow module, or None if it's not installed.
+    It's imported on first use, as it's slow to import.'''
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
@@ -0,0 +1,174 @@
+from threading import Thread, Lock, Event
+from collections import namedtuple
+from itertools import count
+from queue import PriorityQueue, Empty
+
+from .engines import search_engines_dict
+from .events import EventBus
+from . import events
+from . import config as cfg
+
+
+SearchJob = namedtuple('SearchJob', ['query', 'engine', 'priority', 'pages'])
+'''A query searched by one engine: the query, the engine object, its priority and its pages generator.'''
+
+
+class SearchScheduler(object):
+    '''Runs a matrix of queries and engines from a global work queue.
+    Jobs advance one page at a time, lower priorities and earlier pages first,
+    so the pages of different queries interleave.'''
+    def __init__(self, workers=cfg.SCHEDULER_WORKERS, engine_limits=None, sink=None):
+        '''
+        :param int workers: optional, the number of worker threads
+        :param dict engine_limits: optional, the maximum concurrent jobs per engine name
+        :param sink: optional, a callable that receives (query, engine, SearchPage) for each page
+        '''
+        self.workers = workers
+        self.engine_limits = dict(cfg.SCHEDULER_ENGINE_LIMITS, **(engine_limits or {}))
+        self.sink = sink
+
+        self._jobs = []
+        self._queue = PriorityQueue()
+        self._order = count()
+        self._running = {}
+        self._waiting = {}
+        self._pending = 0
+        self._lock = Lock()
+        self._sink_lock = Lock()
+        self._done = Event()
+        self._stop = Event()
+        self._console = True
+        self.events = EventBus([events.console], parent=events.bus)
+        '''The scheduler messages; the engines emit their own search events.'''
+
+    def disable_console(self):
+        '''Disables the console output of the scheduler and its engines.'''
+        self._console = False
+        self.events.unsubscribe(events.console)
+        for job in self._jobs:
+            job.engine.disable_console()
+
+    def add(self, query, engine, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, priority=0, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
+        '''Adds a query to search with an engine.
+
+        :param str query: the search query
+        :param str engine: the engine name, a key of search_engines_dict
+        :param int pages: optional, the maximum number of results pages
+        :param int priority: optional, lower values run first
+        '''
+        se = search_engines_dict[engine.lower()](proxy, timeout)
+        if not self._console:
+            se.disable_console()
+        job = SearchJob(query, se, priority, se.iter_pages(query, pages))
+        self._jobs.append(job)
+        with self._lock:
+            self._pending += 1
+            self._done.clear()
+        self._put(job, 0)
+
+    def run(self):
+        '''Runs all jobs and returns the SearchResults per (query, engine name).'''
+        if not self._pending:
+            return self.results()
+        threads = [Thread(target=self._work) for _ in range(self.workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            while not self._done.wait(0.2):
+                pass
+        except KeyboardInterrupt:
+            self.events.message('Interrupted, waiting for the running pages', 'warning')
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        return self.results()
+
+    def results(self):
+        '''Returns the SearchResults per (query, engine name).'''
+        return {
+            (job.query, self._engine_name(job)): job.engine.results 
+            for job in self._jobs
+        }
+
+    def _put(self, job, page):
+        '''Queues the next page of a job.'''
+        self._queue.put((job.priority, page, next(self._order), job))
+
+    def _engine_name(self, job):
+        '''Returns the engine name of a job.'''
+        return job.engine.__class__.__name__.lower()
+
+    def _acquire(self, job, page):
+        '''Reserves an engine slot for the job, or parks the job until one is free.'''
+        name = self._engine_name(job)
+        with self._lock:
+            limit = self.engine_limits.get(name, cfg.SCHEDULER_ENGINE_LIMIT)
+            if limit and self._running.get(name, 0) >= limit:
+                self._waiting.setdefault(name, []).append((job, page))
+                return False
+            self._running[name] = self._running.get(name, 0) + 1
+            return True
+
+    def _release(self, job):
+        '''Frees the job's engine slot and requeues a parked job of the same engine.'''
+        name = self._engine_name(job)
+        with self._lock:
+            self._running[name] -= 1
+            waiting = self._waiting.get(name)
+            parked = waiting.pop(0) if waiting else None
+        if parked:
+            self._put(*parked)
+
+    def _finish(self):
+        '''Marks a job as completed.'''
+        with self._lock:
+            self._pending -= 1
+            if not self._pending:
+                self._done.set()
+
+    def _work(self):
+        '''Advances jobs one page at a time until all are completed.'''
+        while not self._stop.is_set():
+            try:
+                priority, page, _, job = self._queue.get(timeout=0.2)
+            except Empty:
+                continue
+            if not self._acquire(job, page):
+                continue
+            try:
+                result = next(job.pages, None)
+                if result is not None and self.sink:
+                    with self._sink_lock:
+                        self.sink(job.query, job.engine, result)
+            except Exception as e:
+                msg = u'{} "{}": {}'.format(job.engine.__class__.__name__, job.query, e)
+                job.engine.events.emit(events.ERROR, message=msg)
+                result = None
+            finally:
+                self._release(job)
+
+            if result is None:
+                self._finish()
+            else:
+                self._put(job, page + 1)
+
+
+def search_many(queries, engines, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES, sink=None, workers=cfg.SCHEDULER_WORKERS, engine_limits=None, proxy=cfg.PROXY, timeout=cfg.TIMEOUT):
+    '''Searches every query with every engine from a shared work queue.
+
+    :param list queries: the search queries, or (query, priority) tuples
+    :param list engines: the engine names
+    :param int pages: optional, the maximum number of results pages per query
+    :param sink: optional, a callable that receives (query, engine, SearchPage) for each page
+    :param int workers: optional, the number of worker threads
+    :param dict engine_limits: optional, the maximum concurrent jobs per engine name
+    :returns dict of SearchResults per (query, engine name)
+    '''
+    scheduler = SearchScheduler(workers, engine_limits, sink)
+    for query in queries:
+        query, priority = query if isinstance(query, tuple) else (query, 0)
+        for engine in engines:
+            scheduler.add(query, engine, pages, priority, proxy, timeout)
+    return scheduler.run()
@@ -19,6 +19,10 @@ def is_url(link):
     parts = requests.utils.urlparse(link)
     return bool(parts.scheme and parts.netloc)
 
+def host(url):
+    '''Returns the host name of URL'''
+    return (requests.utils.urlparse(url).hostname or u'').lower()
+
 def domain(url):
     '''Returns domain form URL'''
     host = requests.utils.urlparse(url).netloc
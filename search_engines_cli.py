@@ -5,6 +5,9 @@ try:
     from search_engines.engines import search_engines_dict
     from search_engines.multiple_search_engines import MultipleSearchEngines, AllSearchEngines
     from search_engines import config
+    from search_engines.cache import get_cache
+    from search_engines.metrics import MetricsServer
+    from search_engines import events
 except ImportError as e:
     msg = '"{}"\nPlease install `search_engines` to resolve this error.'
     raise ImportError(msg.format(str(e)))
@@ -25,27 +28,52 @@ def main():
     Usage:
     -q : Specifies the search query (required).
     -e : Specifies the search engine(s) to use. Can be a comma-separated list or "all". Default is "google".
-    -o : Specifies the output file format ("html", "csv", "json") or "print" (default).
+    -o : Specifies the output file format(s) ("html", "csv", "json", "jsonl", "parquet"), comma separated, or "print" (default).
+         Files are written as the pages arrive, and are complete even if the search is interrupted.
     -n : Specifies the filename for the output file. Default is config.OUTPUT_DIR + "output".
     -p : Specifies the number of pages of search results to retrieve. Default is config.SEARCH_ENGINE_RESULTS_PAGES.
     -f : Specifies how to filter search results ("url", "title", "text", "host").
+    -w : Specifies how many search engines run concurrently. Default is config.SEARCH_ENGINE_WORKERS.
     -i : Flag to ignore duplicate URLs in the search results when using multiple search engines.
+    -cache : Specifies a directory to cache HTTP responses in, and reports the cache hit ratio. Default is config.CACHE_DIR.
+    -record : Specifies a cassette file to record the HTTP requests and responses in.
+    -replay : Specifies a cassette file to replay the HTTP responses from, without network access.
+    -metrics : Specifies a local port to serve live metrics on (/metrics, /metrics.json) during the search.
+    -trace : Specifies a file to append the search events to, as JSON lines.
+    -spans : Specifies a file to append the searches to as OpenTelemetry spans (OTLP/JSON).
+    -parser : Specifies the HTML parser backend ("lxml", "html.parser"). Default is config.PARSER.
     -proxy : Specifies a proxy server to use for the search requests (format: protocol://ip:port). Default is config.PROXY.
     """
     
     ap = argparse.ArgumentParser()
     ap.add_argument('-q', help='query (required)', required=True)
     ap.add_argument('-e', help='search engine(s) - ' + ', '.join(search_engines_dict) + ' (default: "google")', default='google')
-    ap.add_argument('-o', help='output file [html, csv, json] (default: print)', default='print')
+    ap.add_argument('-o', help='output file(s) [html, csv, json, jsonl, parquet], comma separated (default: print)', default='print')
     ap.add_argument('-n', help='filename for output file', default=config.OUTPUT_DIR+'output')
     ap.add_argument('-p', help='number of pages', default=config.SEARCH_ENGINE_RESULTS_PAGES, type=int)
     ap.add_argument('-f', help='filter results [url, title, text, host]')
+    ap.add_argument('-w', help='number of search engines that run concurrently', default=config.SEARCH_ENGINE_WORKERS, type=int)
     ap.add_argument('-i', help='ignore duplicates, useful when multiple search engines are used', action='store_true')
     ap.add_argument('-proxy', help='use proxy (protocol://ip:port)', default=config.PROXY)
+    ap.add_argument('-cache', help='cache HTTP responses in this directory', default=config.CACHE_DIR)
+    ap.add_argument('-record', help='record HTTP requests to this cassette file')
+    ap.add_argument('-replay', help='replay HTTP responses from this cassette file')
+    ap.add_argument('-metrics', help='serve live metrics on this local port', default=config.METRICS_PORT, type=int)
+    ap.add_argument('-trace', help='write the search events to this JSON lines file')
+    ap.add_argument('-spans', help='write OpenTelemetry spans (OTLP/JSON) to this file')
+    ap.add_argument('-parser', help='HTML parser [lxml, html.parser] (default: {})'.format(config.PARSER), default=config.PARSER)
     
     args = ap.parse_args()
 
     proxy = args.proxy
+    config.CACHE_DIR = args.cache
+    if args.record or args.replay:
+        config.CASSETTE = args.record or args.replay
+        config.CASSETTE_MODE = 'record' if args.record else 'replay'
+    if args.trace:
+        events.bus.subscribe(events.JsonlWriter(args.trace))
+    if args.spans:
+        events.bus.subscribe(events.SpanExporter(args.spans))
     timeout = config.TIMEOUT + (10 * bool(proxy))
     engines = [
         e.strip() for e in args.e.lower().split(',') 
@@ -63,11 +91,23 @@ def main():
             engine = search_engines_dict[engines[0]](proxy, timeout)
 
         engine.ignore_duplicate_urls = args.i
+        engine.parser = args.parser
+        if isinstance(engine, MultipleSearchEngines):
+            engine.workers = args.w
         if args.f:
             engine.set_search_operator(args.f)
+        if args.metrics is not None:
+            source = engine.all_metrics if isinstance(engine, MultipleSearchEngines) else lambda: [engine.metrics]
+            server = MetricsServer(source, args.metrics).start()
+            print('Metrics: ' + server.url)
         
-        engine.search(args.q, args.p)
-        engine.output(args.o, args.n)
+        engine.search(args.q, args.p, args.o, args.n)
+        if 'print' in args.o.lower():
+            engine.output('print')
+
+        if args.cache:
+            cache = get_cache(args.cache)
+            print('Cache hit ratio: {:.1%} ({} hits, {} misses)'.format(cache.hit_ratio(), cache.hits, cache.misses))
 
 if __name__ == '__main__':
     """
@@ -11,5 +11,6 @@ setup(
     author='Tasos M. Adamopoulos',
     license='MIT',
     packages=find_packages(),
-    install_requires=requirements
+    install_requires=requirements,
+    extras_require={'lxml': ['lxml'], 'async': ['httpx[socks]'], 'http2': ['httpx[http2,socks]'], 'compression': ['brotli', 'zstandard'], 'parquet': ['pyarrow']}
 )
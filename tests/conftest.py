@@ -0,0 +1,37 @@
+import pytest
+
+from search_engines import config
+from search_engines.mock_server import MockSerpServer
+from search_engines.rate_limiter import reset_limiters
+
+
+@pytest.fixture
+def fast_limits(monkeypatch):
+    '''Paces requests to every host at 100 per second.'''
+    monkeypatch.setattr(config, 'RATE_LIMIT', {'rate': 100.0, 'burst': 10, 'max_rate': 100.0})
+    monkeypatch.setattr(config, 'RATE_LIMITS', {})
+    reset_limiters()
+    yield
+    reset_limiters()
+
+
+@pytest.fixture
+def mock_serp(fast_limits, monkeypatch):
+    '''Returns a function that starts a MockSerpServer with the given options,
+    and sends the engines' requests to it. The servers stop after the test.'''
+    servers = []
+
+    def start(**options):
+        server = MockSerpServer(**options).start()
+        servers.append(server)
+        monkeypatch.setattr(config, 'BASE_URLS', server.base_urls())
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def server(mock_serp):
+    '''A MockSerpServer with the default options.'''
+    return mock_serp()
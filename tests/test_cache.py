@@ -0,0 +1,63 @@
+import pytest
+
+from search_engines import config
+from search_engines.engines import Aol, Bing, Google, Startpage
+from search_engines.engines.metager import Metager
+from search_engines.rate_limiter import get_limiter
+
+
+@pytest.fixture
+def server(mock_serp, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_DIR', str(tmp_path))
+    return mock_serp(pages=2)
+
+
+def search(query):
+    engine = Startpage()
+    engine.disable_console()
+    engine.search(query, 1)
+    return engine
+
+
+def test_captcha_pages_are_not_cached(server):
+    '''A captcha page served with a 200 is rejected by the engine, and not cached.'''
+    server.captcha_rate = 1.0
+    engine = search('cached query')
+    assert engine.is_banned
+    assert not engine.results
+
+    server.captcha_rate = 0.0
+    engine = search('cached query')
+    assert not engine.is_banned
+    assert len(engine.results) == 10
+    assert engine.requests_info()[-1].source == 'network'
+
+
+def test_cache_hits_do_not_update_pacing(server):
+    '''Responses served from the cache don't count as requests to the host.'''
+    search('pacing query')
+    limiter = get_limiter(server.base_urls()['startpage'])
+    requests = limiter.stats()['requests']
+
+    engine = search('pacing query')
+    assert len(engine.results) == 10
+    assert engine.requests_info()[-1].source == 'cache'
+    assert limiter.stats()['requests'] == requests
+
+
+@pytest.mark.parametrize('engine', [Google, Bing, Aol, Startpage, Metager])
+def test_second_run_is_served_from_the_cache(server, engine):
+    '''Home page, consent and redirect requests are cached along with the results pages.'''
+    name = engine.__name__.lower()
+    first = engine()
+    first.disable_console()
+    first.search('warm query', 2)
+    assert len(first.results) == 20
+    requests = server.requests[name]
+
+    second = engine()
+    second.disable_console()
+    second.search('warm query', 2)
+    assert len(second.results) == 20
+    assert server.requests[name] == requests
+    assert {info.source for info in second.requests_info()} == {'cache'}
@@ -0,0 +1,33 @@
+import io
+
+from search_engines.console import Console
+
+
+class _FailingStream(io.StringIO):
+    def __init__(self, error):
+        super(_FailingStream, self).__init__()
+        self.error = error
+
+    def write(self, data):
+        raise self.error
+
+
+def test_closed_stream_is_ignored(capsys):
+    '''A broken pipe doesn't stop the writer, and isn't reported.'''
+    console = Console(_FailingStream(BrokenPipeError()))
+    console.write(u'lost')
+    console.flush(5.0)
+    assert capsys.readouterr().err == u''
+
+    console.stream = io.StringIO()
+    console.write(u'written')
+    console.flush(5.0)
+    assert console.stream.getvalue() == u'written\n'
+
+
+def test_writer_errors_are_reported(capsys):
+    '''Other errors are printed to stderr, and the queued messages are still released.'''
+    console = Console(_FailingStream(TypeError('bad message')))
+    console.write(u'message')
+    console.flush(5.0)
+    assert u'TypeError: bad message' in capsys.readouterr().err
@@ -0,0 +1,111 @@
+import socket
+import asyncio
+from time import sleep
+from threading import Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import urllib3.util.connection
+
+from search_engines.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/slow-redirect':
+            sleep(0.3)
+            self.send_response(302)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html>ok</html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(fast_limits):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_refused_first_address_falls_back_to_the_next(server, monkeypatch):
+    '''A host whose first address refuses connections is reached on its next address.'''
+    getaddrinfo = socket.getaddrinfo
+
+    def resolve(host, port, *args, **kwargs):
+        if host != 'dual-stack.test':
+            return getaddrinfo(host, port, *args, **kwargs)
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', port)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))
+        ]
+    monkeypatch.setattr(socket, 'getaddrinfo', resolve)
+
+    client = HttpClient(timeout=5, proxy=None)
+    response = client.get('http://dual-stack.test:{}/'.format(server))
+
+    assert response.http == 200
+    assert response.html == '<html>ok</html>'
+    assert response.info.dns is not None
+    assert response.info.connect is not None
+    assert not response.info.reused
+
+
+def test_urllib3_is_not_patched():
+    '''Timing requests leaves the networking of other urllib3 users untouched.'''
+    assert urllib3.util.connection.socket is socket
+
+
+def test_ttfb_is_the_final_response_time(server):
+    '''The time to first byte excludes the redirect hops.'''
+    client = HttpClient(timeout=5, proxy=None)
+    response = client.get('http://127.0.0.1:{}/slow-redirect'.format(server))
+
+    assert response.html == '<html>ok</html>'
+    assert response.info.redirects == 1
+    assert response.info.total >= 0.3
+    assert response.info.ttfb < 0.2
+
+
+def test_async_client_errors_are_failed_responses():
+    '''A SOCKS proxy without socksio, or an unreachable host, is a http=0 response, not an exception.'''
+    pytest.importorskip('httpx')
+    from search_engines.http_client import AsyncHttpClient
+
+    async def get(proxy, url):
+        client = AsyncHttpClient(HttpClient(timeout=5, proxy=proxy))
+        try:
+            return await client.get(url)
+        finally:
+            await client.close()
+
+    response = asyncio.run(get('socks5h://127.0.0.1:9', 'http://example.onion/'))
+    assert response.http == 0
+    response = asyncio.run(get(None, 'http://127.0.0.1:9/'))
+    assert response.http == 0
+    assert response.info.status == 0
+
+
+def test_closing_a_session_keeps_the_shared_pools(server):
+    '''An engine closing its session doesn't close the connections of the other engines.'''
+    url = 'http://127.0.0.1:{}/'.format(server)
+    first, second = HttpClient(timeout=5, proxy=None), HttpClient(timeout=5, proxy=None)
+    first.get(url)
+    second.session.close()
+
+    assert first.get(url).info.reused
+    first.session.close()
@@ -0,0 +1,79 @@
+import csv
+import asyncio
+from time import sleep
+
+import pytest
+
+from search_engines.multiple_search_engines import MultipleSearchEngines
+from search_engines.output import flush_console
+
+
+@pytest.fixture
+def server(mock_serp):
+    return mock_serp(pages=3, latency=('uniform', 0.0, 0.05), seed=1)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_streamed_report_matches_merged_results(server, tmp_path, workers):
+    '''The CSV report lists the merged results, in engine order, without cross-engine duplicates.'''
+    engines = MultipleSearchEngines(['google', 'bing', 'yahoo'])
+    engines.disable_console()
+    engines.workers = workers
+    engines.ignore_duplicate_urls = True
+    results = engines.search('duplicated query', 2, 'csv', str(tmp_path / 'report'))
+
+    with open(str(tmp_path / 'report.csv'), encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row['engine'], row['URL']) for row in rows] == [
+        (engine.__class__.__name__, item['link'])
+        for engine in engines._engines for item in engine.results
+    ]
+    assert [row['URL'] for row in rows] == results.links()
+    assert len(rows) == 20
+
+
+@pytest.mark.parametrize('console', [True, False])
+def test_disable_console_silences_reports(server, tmp_path, capsys, console):
+    '''The report files are announced on the console, unless it's disabled.'''
+    engines = MultipleSearchEngines(['google', 'bing'])
+    if not console:
+        engines.disable_console()
+    engines.search('quiet query', 1, 'csv', str(tmp_path / 'report'))
+    engines.output('json', str(tmp_path / 'report'))
+    flush_console()
+
+    printed = capsys.readouterr().out
+    assert ('Output file: ' + str(tmp_path / 'report.csv') in printed) is console
+    assert ('Output file: ' + str(tmp_path / 'report.json') in printed) is console
+    assert (printed == '') is not console
+
+
+def test_async_search_keeps_the_other_engines_results(server):
+    '''An engine that raises doesn't abort the other engines' async searches.'''
+    engines = MultipleSearchEngines(['google', 'bing', 'yahoo'])
+    engines.disable_console()
+
+    def fail():
+        raise ImportError('Using SOCKS proxy, but the socksio package is not installed.')
+    engines._engines[1]._first_page = fail
+    results = asyncio.run(engines.asearch('async query', 1))
+
+    assert [len(engine.results) for engine in engines._engines] == [10, 0, 10]
+    assert len(results) == 20
+
+
+def test_interrupted_search_waits_for_the_running_engines(server):
+    '''After Ctrl-C the running engines stop after their current page, before the results are merged.'''
+    engines = MultipleSearchEngines(['google', 'bing', 'yahoo'])
+    engines.disable_console()
+    engines.workers = 3
+
+    def interrupt(query, pages, report):
+        raise KeyboardInterrupt()
+    engines._engines[0]._search = interrupt
+    results = engines.search('interrupted query', 3)
+
+    counts = [len(engine.results) for engine in engines._engines]
+    sleep(0.3)
+    assert [len(engine.results) for engine in engines._engines] == counts
+    assert len(results) == sum(counts)
@@ -0,0 +1,23 @@
+from search_engines.output import Highlighter
+
+
+def test_highlighter_matches_quoted_phrases_without_operators():
+    '''Quotes and operators are stripped from the terms, and excluded terms are left as they are.'''
+    highlight = Highlighter(u'"remote jobs" site:easyapply.co -spam python')
+    text = u'Remote Jobs in Python at easyapply.co, no spam, remote work'
+    assert highlight(text) == (
+        u'<b>Remote Jobs</b> in <b>Python</b> at <b>easyapply.co</b>, no spam, remote work'
+    )
+
+
+def test_highlighter_ignores_queries_without_terms():
+    '''A query of excluded terms and boolean operators highlights nothing.'''
+    assert Highlighter.terms(u'-spam OR') == []
+    assert Highlighter(u'-spam OR')(u'spam or eggs') == u'spam or eggs'
+
+
+def test_highlighter_strips_wildcard_labels():
+    '''site:*.easyapply.co highlights the domain in the links of its subdomains.'''
+    assert Highlighter.terms(u'site:*.easyapply.co') == [u'easyapply.co']
+    highlight = Highlighter(u'site:*.easyapply.co')
+    assert highlight(u'https://jobs.easyapply.co/apply') == u'https://jobs.<b>easyapply.co</b>/apply'
@@ -0,0 +1,31 @@
+import os
+import glob
+
+import pytest
+
+from search_engines.engines import search_engines_dict
+from search_engines.parsers import ParsedPage, compare_parsers, _response
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def load_pages(name):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, name, '*.*'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+@pytest.mark.parametrize('name', sorted(os.listdir(FIXTURES_DIR)))
+def test_parsers_extract_the_same_results(name):
+    '''The opt-in lxml backend extracts the same results as html.parser from the saved pages.'''
+    pytest.importorskip('lxml')
+    pages = load_pages(name)
+    assert pages
+
+    engine = search_engines_dict[name]()
+    engine._query = 'search engines benchmark'
+    assert engine._filter_results(ParsedPage(_response(200, pages[0]), 'lxml'))
+    assert compare_parsers(engine, pages) == []
@@ -0,0 +1,115 @@
+from email.utils import parsedate_to_datetime
+
+import pytest
+
+from search_engines import config
+from search_engines.rate_limiter import TokenBucket, get_limiter, reset_limiters, parse_retry_after
+
+
+class Clock(object):
+    '''A clock that only moves when the test advances it.'''
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', {
+        'increase': 0.1, 'recovery': 2, 'decrease': 0.5, 'min_ratio': 0.25, 'window': 10
+    })
+    return Clock()
+
+
+def test_reservations_are_spaced_by_the_rate(clock):
+    '''Requests reserved at once wait 1/rate seconds more than the previous one.'''
+    bucket = TokenBucket(2.0, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.5, 1.0]
+
+    clock.advance(1.0)
+    assert bucket.reserve() == 0.5
+
+
+def test_burst_is_sent_at_once_and_capped(clock):
+    '''Up to `burst` requests go without waiting, idle time doesn't save more tokens.'''
+    bucket = TokenBucket(1.0, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+    clock.advance(100.0)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_ban_holds_requests_and_halves_the_rate(clock):
+    '''A ban with Retry-After holds the next request that long, at half the rate.'''
+    bucket = TokenBucket(1.0, clock=clock)
+    bucket.ban(retry_after=10)
+
+    assert bucket.rate == 0.5
+    assert bucket.reserve() == pytest.approx(10.0)
+    assert bucket.reserve() == pytest.approx(12.0)
+
+
+def test_bans_stop_at_the_minimum_rate(clock):
+    '''Repeated bans cut the rate down to min_ratio of the initial rate.'''
+    bucket = TokenBucket(1.0, clock=clock)
+    for _ in range(5):
+        bucket.ban()
+    assert bucket.rate == 0.25
+    assert bucket.stats() == {'rate': 0.25, 'ban_ratio': 1.0, 'requests': 5}
+
+
+def test_successes_raise_the_rate_up_to_max_rate(clock):
+    '''The rate grows by a step after `recovery` consecutive successes, to max_rate at most.'''
+    bucket = TokenBucket(1.0, max_rate=1.15, clock=clock)
+    bucket.success()
+    assert bucket.rate == 1.0
+    bucket.success()
+    assert bucket.rate == pytest.approx(1.1)
+    for _ in range(4):
+        bucket.success()
+    assert bucket.rate == 1.15
+
+    bucket.ban()
+    bucket.success()
+    assert bucket.rate == 0.575
+    assert bucket.stats()['ban_ratio'] == pytest.approx(1 / 8.0)
+
+
+def test_limiters_are_shared_per_host(monkeypatch):
+    '''All URLs of a host share a limiter, configured by RATE_LIMITS or RATE_LIMIT.'''
+    monkeypatch.setattr(config, 'RATE_LIMIT', {'rate': 2.0, 'burst': 1})
+    monkeypatch.setattr(config, 'RATE_LIMITS', {'www.google.com': {'rate': 0.25, 'burst': 1}})
+    reset_limiters()
+
+    google = get_limiter('https://www.google.com/search?q=a')
+    assert get_limiter('https://www.google.com/search?q=b&start=10') is google
+    assert google.rate == 0.25
+    bing = get_limiter('https://www.bing.com/search?q=a')
+    assert bing is not google
+    assert bing.rate == 2.0
+
+    reset_limiters()
+    assert get_limiter('https://www.google.com/') is not google
+    reset_limiters()
+
+
+def test_retry_after_seconds():
+    '''Retry-After in seconds; missing or invalid values are None.'''
+    assert parse_retry_after({'Retry-After': '120'}) == 120.0
+    assert parse_retry_after({'Retry-After': '-5'}) == 0.0
+    assert parse_retry_after({'Retry-After': 'soon'}) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after(None) is None
+
+
+def test_retry_after_http_date():
+    '''A HTTP date is the seconds from now until then, or 0 if it's past.'''
+    date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    then = parsedate_to_datetime(date).timestamp()
+    assert parse_retry_after({'Retry-After': date}, now=then - 30) == 30.0
+    assert parse_retry_after({'Retry-After': date}, now=then + 30) == 0.0
@@ -0,0 +1,108 @@
+from time import sleep
+from threading import Lock
+
+import pytest
+
+from search_engines import events
+from search_engines.scheduler import SearchScheduler
+
+
+@pytest.fixture
+def server(mock_serp):
+    return mock_serp(pages=2, latency=0.05)
+
+
+class RecordingScheduler(SearchScheduler):
+    '''Records the concurrent jobs per engine, and the jobs parked by the engine limits.'''
+    def __init__(self, *args, **kwargs):
+        super(RecordingScheduler, self).__init__(*args, **kwargs)
+        self.peaks = {}
+        self.parked = 0
+
+    def _acquire(self, job, page):
+        acquired = super(RecordingScheduler, self)._acquire(job, page)
+        name = self._engine_name(job)
+        with self._lock:
+            self.peaks[name] = max(self.peaks.get(name, 0), self._running.get(name, 0))
+            self.parked += not acquired
+        return acquired
+
+
+def make_scheduler(cls=SearchScheduler, **kwargs):
+    scheduler = cls(**kwargs)
+    scheduler.disable_console()
+    return scheduler
+
+
+def test_engine_limits_park_and_resume_jobs(server):
+    '''Jobs beyond an engine's limit wait for a free slot, then run to completion.'''
+    scheduler = make_scheduler(RecordingScheduler, workers=4, engine_limits={'bing': 1})
+    for query in ('first', 'second', 'third'):
+        scheduler.add(query, 'bing', 2)
+    scheduler.add('other engine', 'yahoo', 2)
+    results = scheduler.run()
+
+    assert scheduler.peaks['bing'] == 1
+    assert scheduler.parked > 0
+    assert {key: len(value) for key, value in results.items()} == {
+        ('first', 'bing'): 20, ('second', 'bing'): 20, ('third', 'bing'): 20, ('other engine', 'yahoo'): 20
+    }
+
+
+def test_jobs_run_by_priority_then_page(server):
+    '''Lower priorities go first, and jobs of the same priority interleave their pages.'''
+    pages = []
+    scheduler = make_scheduler(workers=1, sink=lambda query, engine, page: pages.append((query, page.number)))
+    scheduler.add('later', 'bing', 2, priority=1)
+    scheduler.add('first', 'bing', 2)
+    scheduler.add('second', 'yahoo', 2)
+    scheduler.run()
+
+    assert pages == [
+        ('first', 1), ('second', 1), ('first', 2), ('second', 2), ('later', 1), ('later', 2)
+    ]
+
+
+def test_sink_is_called_by_one_worker_at_a_time(server):
+    '''The sink needs no locking of its own, even with many workers.'''
+    lock = Lock()
+    calls = []
+    overlaps = []
+
+    def sink(query, engine, page):
+        if not lock.acquire(blocking=False):
+            overlaps.append(query)
+            return
+        try:
+            calls.append((query, engine.__class__.__name__, page.number))
+            sleep(0.01)
+        finally:
+            lock.release()
+
+    scheduler = make_scheduler(workers=8, sink=sink)
+    for engine in ('bing', 'yahoo', 'duckduckgo', 'mojeek'):
+        for query in ('one', 'two'):
+            scheduler.add(query, engine, 2)
+    scheduler.run()
+
+    assert overlaps == []
+    assert len(calls) == 16
+
+
+def test_failing_job_finishes_and_reports_an_error(server):
+    '''A job that raises is finished with an error event; the other jobs complete.'''
+    scheduler = make_scheduler(workers=2)
+    scheduler.add('broken', 'bing', 2)
+    scheduler.add('working', 'yahoo', 2)
+    failed = scheduler._jobs[0].engine
+    errors = []
+
+    def fail():
+        raise ValueError('unexpected markup')
+    failed._first_page = fail
+    failed.events.subscribe(lambda event: event.type == events.ERROR and errors.append(event))
+    results = scheduler.run()
+
+    assert len(results[('broken', 'bing')]) == 0
+    assert len(results[('working', 'yahoo')]) == 20
+    assert [event.data['message'] for event in errors] == ['Bing "broken": unexpected markup']